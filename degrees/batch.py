@@ -0,0 +1,113 @@
+import csv
+import json
+import sys
+
+import degrees
+from costar import SearchTree
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python batch.py directory [pairs.csv]")
+    directory = sys.argv[1]
+
+    # Load data from files into memory once for every query
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(directory)
+    print("Data loaded.", file=sys.stderr)
+
+    if len(sys.argv) == 3 and sys.argv[2] != "-":
+        with open(sys.argv[2], encoding="utf-8") as f:
+            pairs = read_pairs(f)
+    else:
+        pairs = read_pairs(sys.stdin)
+
+    for result in answer(pairs):
+        print(json.dumps(result))
+
+
+def read_pairs(f):
+    """
+    Returns a list of (source, target) pairs from a CSV file with one
+    pair of names, or person ids, per line.
+    """
+    pairs = []
+    for row in csv.reader(f):
+        if len(row) == 0:
+            continue
+        if len(row) != 2:
+            raise ValueError(f"Expected two names per line, got: {row}")
+        pairs.append((row[0].strip(), row[1].strip()))
+    return pairs
+
+
+def resolve(name):
+    """
+    Returns the person id for a name or person id, or raises
+    LookupError if there is no such person or the name is ambiguous.
+    """
+    if name in degrees.people:
+        return name
+    person_ids = sorted(degrees.names.get(name.lower(), set()))
+    if len(person_ids) == 0:
+        suggestions = degrees.suggest_names(name)
+        if len(suggestions) == 0:
+            raise LookupError(f"Person not found: {name}")
+        raise LookupError(
+            f"Person not found: {name}, did you mean: {', '.join(suggestions)}"
+        )
+    if len(person_ids) > 1:
+        raise LookupError(
+            f"Ambiguous name: {name}, candidates: {', '.join(person_ids)}"
+        )
+    return person_ids[0]
+
+
+def answer(pairs):
+    """
+    Returns one result dictionary per (source, target) pair, in order.
+
+    Queries sharing a source are answered from a single breadth-first
+    search tree, grown only as far as their furthest target needs.
+    """
+    graph = degrees.graph
+    results = [None] * len(pairs)
+
+    # Group queries by source person
+    by_source = {}
+    for i, (source_name, target_name) in enumerate(pairs):
+        result = {"source": source_name, "target": target_name}
+        results[i] = result
+        try:
+            source = graph.person_index[resolve(source_name)]
+            target = graph.person_index[resolve(target_name)]
+        except LookupError as e:
+            result["error"] = str(e)
+            continue
+        by_source.setdefault(source, []).append((target, result))
+
+    for source, queries in by_source.items():
+        tree = SearchTree(graph, source)
+        for target, result in queries:
+            tree.run(target)
+            if tree.dist[target] < 0:
+                result["degrees"] = None
+                result["path"] = None
+                continue
+            path = tree.path_to(target)
+            result["degrees"] = len(path)
+            result["path"] = [
+                {
+                    "movie_id": graph.movie_ids[movie],
+                    "title": degrees.movies[graph.movie_ids[movie]]["title"],
+                    "person_id": graph.person_ids[person],
+                    "name": degrees.people[graph.person_ids[person]]["name"]
+                }
+                for movie, person in path
+            ]
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
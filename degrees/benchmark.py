@@ -0,0 +1,203 @@
+import multiprocessing
+import os
+import queue as queues
+import random
+import resource
+import shutil
+import sys
+import time
+
+import numpy as np
+
+import degrees
+import snapshot
+
+# Search modes timed by the benchmark
+MODES = ("bfs", "bidirectional", "alt")
+
+# Seed for both the synthetic graph and the query set
+SEED = 50
+
+# Exponent of the power law giving each person's share of credits
+ALPHA = 0.8
+
+# Average number of credited stars per movie
+CAST = 4
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python benchmark.py people [queries]")
+    num_people = int(sys.argv[1])
+    num_queries = int(sys.argv[2]) if len(sys.argv) == 3 else 100
+
+    directory = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "synthetic", str(num_people)
+    )
+    if not os.path.exists(os.path.join(directory, "stars.csv")):
+        print(f"Generating {num_people} people in {directory}...")
+        start = time.perf_counter()
+        generate(directory, num_people)
+        print(f"Generated in {time.perf_counter() - start:.2f}s.")
+
+    # Time loading from the CSV files, then from the snapshot they leave behind
+    shutil.rmtree(snapshot.snapshot_dir(directory), ignore_errors=True)
+    for label in ("csv", "snapshot"):
+        report = measure(directory, num_queries)
+        print_report(label, report)
+
+
+def generate(directory, num_people, seed=SEED):
+    """
+    Writes people.csv, movies.csv and stars.csv for a synthetic co-star
+    graph to `directory`, with a power-law distribution of credits.
+    """
+    rng = np.random.default_rng(seed)
+    num_movies = max(1, num_people // 2)
+    os.makedirs(directory, exist_ok=True)
+
+    # Draw cast sizes, then draw each credit's star in proportion to a
+    # power-law weight, so a few people appear in very many movies
+    cast = rng.geometric(1 / CAST, size=num_movies)
+    weights = np.arange(1, num_people + 1, dtype=np.float64) ** -ALPHA
+    weights /= weights.sum()
+    star_people = rng.choice(num_people, size=cast.sum(), p=weights)
+    star_movies = np.repeat(np.arange(num_movies), cast)
+
+    # Shuffle ids so popularity is not tied to position in the file
+    person_ids = rng.permutation(num_people) + 1
+    births = rng.integers(1900, 2010, size=num_people)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8") as f:
+        f.write("id,name,birth\n")
+        write_rows(f, (
+            f'{person_ids[i]},"Person {person_ids[i]}",{births[i]}\n'
+            for i in range(num_people)
+        ))
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8") as f:
+        f.write("id,title,year\n")
+        write_rows(f, (
+            f'{i + 1},"Movie {i + 1}",{1900 + i % 120}\n'
+            for i in range(num_movies)
+        ))
+
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8") as f:
+        f.write("person_id,movie_id\n")
+        write_rows(f, (
+            f"{person_ids[p]},{m + 1}\n"
+            for p, m in zip(star_people.tolist(), star_movies.tolist())
+        ))
+
+
+def write_rows(f, rows, chunk=100000):
+    """
+    Writes an iterable of lines to `f` in chunks.
+    """
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) == chunk:
+            f.write("".join(buffer))
+            buffer = []
+    f.write("".join(buffer))
+
+
+def measure(directory, num_queries):
+    """
+    Runs `benchmark` in a fresh process, so load time and peak memory
+    are not affected by earlier runs, and returns its report.
+
+    Raises RuntimeError if the process dies without reporting,
+    for example when it runs out of memory.
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=benchmark, args=(directory, num_queries, queue)
+    )
+    process.start()
+
+    # Poll, so a process killed before reporting cannot hang the benchmark
+    report = None
+    while report is None:
+        try:
+            report = queue.get(timeout=1)
+        except queues.Empty:
+            if process.is_alive():
+                continue
+            try:
+                report = queue.get(timeout=1)
+            except queues.Empty:
+                raise RuntimeError(
+                    f"Benchmark process exited with code {process.exitcode} "
+                    "without a report"
+                ) from None
+    process.join()
+    return report
+
+
+def benchmark(directory, num_queries, queue):
+    """
+    Loads `directory` and times a fixed set of queries in every mode,
+    putting a report dictionary on `queue`.
+    """
+    report = {}
+
+    start = time.perf_counter()
+    degrees.load_data(directory)
+    report["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    degrees.load_landmarks()
+    report["landmarks"] = time.perf_counter() - start
+
+    # Query between people with at least one credit
+    graph = degrees.graph
+    credited = np.flatnonzero(np.diff(graph.person_movies_ptr) > 0)
+    person_ids = [graph.person_ids[i] for i in credited]
+
+    rng = random.Random(SEED)
+    queries = [tuple(rng.sample(person_ids, 2)) for _ in range(num_queries)]
+
+    for mode in MODES:
+        latencies = []
+        expanded = []
+        for source, target in queries:
+            start = time.perf_counter()
+            degrees.shortest_path(source, target, mode)
+            latencies.append(time.perf_counter() - start)
+            expanded.append(degrees.stats["expanded"])
+        report[mode] = {
+            "latency": np.percentile(latencies, [50, 90, 99]).tolist(),
+            "expanded": np.mean(expanded)
+        }
+
+    report["rss"] = peak_rss()
+    queue.put(report)
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in MiB.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kibibytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return rss / 2 ** 20
+    return rss / 2 ** 10
+
+
+def print_report(label, report):
+    print(f"Loaded from {label} in {report['load']:.2f}s, "
+          f"landmarks ready in {report['landmarks']:.2f}s, "
+          f"peak RSS {report['rss']:.0f} MiB")
+    print(f"  {'mode':<14}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'expanded':>12}")
+    for mode in MODES:
+        p50, p90, p99 = (1000 * t for t in report[mode]["latency"])
+        expanded = report[mode]["expanded"]
+        print(f"  {mode:<14}{p50:>10.2f}{p90:>10.2f}{p99:>10.2f}{expanded:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
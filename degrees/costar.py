@@ -0,0 +1,256 @@
+import numpy as np
+
+
+class CoStarGraph():
+    """
+    Person -> movie -> person adjacency stored in compressed sparse row
+    form, with person and movie ids interned to dense integers.
+    """
+
+    def __init__(self, person_ids, movie_ids,
+                 person_movies_ptr, person_movies,
+                 movie_people_ptr, movie_people):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+
+        # Searches by index alone can skip interning the ids
+        self.person_index = {pid: i for i, pid in enumerate(person_ids or [])}
+        self.movie_index = {mid: i for i, mid in enumerate(movie_ids or [])}
+
+        # Movies of person i are person_movies[person_movies_ptr[i]:person_movies_ptr[i + 1]]
+        self.person_movies_ptr = person_movies_ptr
+        self.person_movies = person_movies
+
+        # Stars of movie j are movie_people[movie_people_ptr[j]:movie_people_ptr[j + 1]]
+        self.movie_people_ptr = movie_people_ptr
+        self.movie_people = movie_people
+
+    @classmethod
+    def from_stars(cls, person_ids, movie_ids, star_people, star_movies):
+        """
+        Builds the graph from parallel sequences of interned person and
+        movie indices, one pair per starring credit.
+        """
+        star_people = np.asarray(star_people, dtype=np.int32)
+        star_movies = np.asarray(star_movies, dtype=np.int32)
+
+        # Drop credits listed more than once
+        key = star_people.astype(np.int64) * len(movie_ids) + star_movies
+        _, first = np.unique(key, return_index=True)
+        star_people = star_people[first]
+        star_movies = star_movies[first]
+
+        person_movies_ptr, person_movies = compress(
+            star_people, star_movies, len(person_ids)
+        )
+        movie_people_ptr, movie_people = compress(
+            star_movies, star_people, len(movie_ids)
+        )
+        return cls(person_ids, movie_ids,
+                   person_movies_ptr, person_movies,
+                   movie_people_ptr, movie_people)
+
+    @property
+    def num_people(self):
+        return len(self.person_movies_ptr) - 1
+
+    @property
+    def num_movies(self):
+        return len(self.movie_people_ptr) - 1
+
+    def movies_of(self, people):
+        """
+        Returns the movies of every person in `people`, and the position
+        in `people` each movie came from.
+        """
+        return gather(self.person_movies_ptr, self.person_movies, people)
+
+    def stars_of(self, movies):
+        """
+        Returns the stars of every movie in `movies`, and the position
+        in `movies` each star came from.
+        """
+        return gather(self.movie_people_ptr, self.movie_people, movies)
+
+
+class SearchTree():
+    """
+    Breadth-first search tree over a CoStarGraph, grown one whole level
+    at a time from a single source person.
+    """
+
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.depth = 0
+
+        # Distance from the source, or -1 for people not reached yet
+        self.dist = np.full(graph.num_people, -1, dtype=np.int32)
+
+        # The person and movie each reached person was reached through
+        self.parent_person = np.full(graph.num_people, -1, dtype=np.int32)
+        self.parent_movie = np.full(graph.num_people, -1, dtype=np.int32)
+
+        # Movies whose stars have all been reached already
+        self.movie_seen = np.zeros(graph.num_movies, dtype=bool)
+
+        self.dist[source] = 0
+        self.level = np.array([source], dtype=np.int32)
+
+        # Counts of people expanded and enqueued so far
+        self.expanded = 0
+        self.enqueued = 0
+
+    def empty(self):
+        return len(self.level) == 0
+
+    def grow(self):
+        """
+        Expands every person in the current level and returns the
+        people reached for the first time.
+        """
+        movies, owners = self.graph.movies_of(self.level)
+        owners = self.level[owners]
+
+        # A movie only needs expanding once, by the first person to reach it
+        fresh = ~self.movie_seen[movies]
+        movies, first = np.unique(movies[fresh], return_index=True)
+        owners = owners[fresh][first]
+        self.movie_seen[movies] = True
+
+        people, via = self.graph.stars_of(movies)
+
+        # Keep one route to each person not reached before
+        fresh = self.dist[people] < 0
+        people, first = np.unique(people[fresh], return_index=True)
+        via = via[fresh][first]
+
+        self.depth += 1
+        self.dist[people] = self.depth
+        self.parent_movie[people] = movies[via]
+        self.parent_person[people] = owners[via]
+
+        self.expanded += len(self.level)
+        self.enqueued += len(people)
+        self.level = people
+        return people
+
+    def run(self, target=None):
+        """
+        Grows the tree until `target` is reached, or until every
+        reachable person is reached if no target is given.
+        """
+        while not self.empty():
+            if target is not None and self.dist[target] >= 0:
+                break
+            self.grow()
+
+    def path_to(self, person):
+        """
+        Returns the list of (movie, person) index pairs leading
+        from the source to `person`.
+        """
+        out = []
+        while self.dist[person] > 0:
+            out.append((int(self.parent_movie[person]), int(person)))
+            person = self.parent_person[person]
+        out.reverse()
+        return out
+
+    def path_from(self, person):
+        """
+        Returns the list of (movie, person) index pairs leading
+        from `person` back to the source.
+        """
+        out = []
+        while self.dist[person] > 0:
+            movie = int(self.parent_movie[person])
+            person = int(self.parent_person[person])
+            out.append((movie, person))
+        return out
+
+
+def bfs(graph, source, target):
+    """
+    Returns the list of (movie, person) index pairs on a shortest path
+    from `source` to `target`, or None if they are not connected,
+    along with the SearchTree used to find it.
+    """
+    tree = SearchTree(graph, source)
+    tree.run(target)
+    if tree.dist[target] < 0:
+        return None, [tree]
+    return tree.path_to(target), [tree]
+
+
+def bidirectional(graph, source, target, trees=None):
+    """
+    Returns the list of (movie, person) index pairs on a shortest path
+    from `source` to `target`, or None if they are not connected,
+    along with the SearchTrees grown from each end.
+
+    `trees` may give the (forward, backward) pair of SearchTrees to
+    grow, rooted at `source` and `target`, instead of plain ones.
+    """
+    if trees is None:
+        trees = (SearchTree(graph, source), SearchTree(graph, target))
+    forward, backward = trees
+    trees = [forward, backward]
+
+    if source == target:
+        return [], trees
+
+    while not forward.empty() and not backward.empty():
+
+        # Always grow the smaller frontier by one whole level
+        if len(forward.level) <= len(backward.level):
+            grown, other = forward, backward
+        else:
+            grown, other = backward, forward
+        reached = grown.grow()
+
+        # Join both halves where the new level touches the other tree,
+        # picking the meeting person giving the shortest total path
+        met = reached[other.dist[reached] >= 0]
+        if len(met) > 0:
+            meeting = int(met[np.argmin(other.dist[met])])
+            return forward.path_to(meeting) + backward.path_from(meeting), trees
+
+    return None, trees
+
+
+def distance_histogram(graph, source):
+    """
+    Returns a dictionary mapping each number of degrees to the count
+    of people that many degrees away from `source`.
+    """
+    tree = SearchTree(graph, source)
+    tree.run()
+    counts = np.bincount(tree.dist[tree.dist > 0])
+    return {
+        degrees: int(count)
+        for degrees, count in enumerate(counts)
+        if count > 0
+    }
+
+
+def compress(rows, cols, num_rows):
+    """
+    Returns the (ptr, values) CSR arrays grouping `cols` by `rows`.
+    """
+    order = np.argsort(rows, kind="stable")
+    counts = np.bincount(rows, minlength=num_rows)
+    ptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(counts, out=ptr[1:])
+    return ptr, cols[order].astype(np.int32)
+
+
+def gather(ptr, values, rows):
+    """
+    Returns the values of every row in `rows` concatenated together,
+    and the position in `rows` each value came from.
+    """
+    starts = ptr[rows]
+    counts = ptr[np.asarray(rows) + 1] - starts
+    owners = np.repeat(np.arange(len(rows)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return values[starts[owners] + offsets], owners
@@ -1,55 +1,131 @@
 import csv
+import os
 import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 
-from util import Node, StackFrontier, QueueFrontier
+import costar
+import fuzzy
+import landmarks as alt
+import snapshot
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# Maps person_ids to a dictionary of: name, birth
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a dictionary of: title, year
 movies = {}
 
+# Integer-indexed co-star graph linking people through the movies they starred in
+graph = None
+
+# Trigram index over the keys of `names`, for suggesting near misses
+name_index = None
+
+# Landmark distance tables for "alt" searches, loaded or built on first use
+landmarks = None
+
+# Counts of people expanded and enqueued by the most recent search
+stats = {"expanded": 0, "enqueued": 0}
+
+# Directory whose up to date snapshot backs the loaded data, if any
+snapshot_directory = None
+
 
 def load_data(directory):
+    """
+    Load data into memory, from the binary snapshot of `directory`
+    if it is up to date, otherwise from the CSV files, writing a
+    fresh snapshot for the next run.
+    """
+    global graph, name_index, landmarks, snapshot_directory
+
+    landmarks = None
+
+    cached = snapshot.load(directory)
+    if cached is None:
+        load_csv(directory)
+        name_index = fuzzy.NameIndex.build(list(names))
+        try:
+            snapshot.save(directory, people, movies, graph, name_index)
+            snapshot_directory = directory
+        except OSError:
+            pass
+        return
+
+    snapshot_directory = directory
+    person_rows, movie_rows, graph, name_index = cached
+    for person_id, name, birth in person_rows:
+        add_person(person_id, name, birth)
+    for movie_id, title, year in movie_rows:
+        add_movie(movie_id, title, year)
+
+
+def load_csv(directory):
     """
     Load data from CSV files into memory.
     """
+    global graph
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+            add_person(row["id"], row["name"], row["birth"])
 
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+            add_movie(row["id"], row["title"], row["year"])
+
+    # Intern ids to dense integers in file order
+    person_index = {person_id: i for i, person_id in enumerate(people)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movies)}
 
-    # Load stars
+    # Load stars as parallel arrays of interned ids
+    star_people = array("i")
+    star_movies = array("i")
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
             except KeyError:
-                pass
+                continue
+            star_people.append(person)
+            star_movies.append(movie)
+
+    graph = costar.CoStarGraph.from_stars(
+        list(people), list(movies), star_people, star_movies
+    )
+
+
+def add_person(person_id, name, birth):
+    """
+    Adds a person to `people` and indexes them by name.
+    """
+    people[person_id] = {
+        "name": name,
+        "birth": birth
+    }
+    if name.lower() not in names:
+        names[name.lower()] = {person_id}
+    else:
+        names[name.lower()].add(person_id)
+
+
+def add_movie(movie_id, title, year):
+    """
+    Adds a movie to `movies`.
+    """
+    movies[movie_id] = {
+        "title": title,
+        "year": year
+    }
 
 
 def main():
@@ -82,100 +158,183 @@ def main():
             person2 = people[path[i + 1][1]]["name"]
             movie = movies[path[i + 1][0]]["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+    print(f"Expanded {stats['expanded']} people, enqueued {stats['enqueued']}.")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, mode="bidirectional"):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `mode` selects the search: "bfs" grows a single frontier from the
+    source, "bidirectional" grows frontiers from both ends until they meet,
+    and "alt" grows both frontiers only through people whose distance
+    bounds from landmark people leave them on a short enough path.
+
+    "alt" offers no gain on power-law graphs such as co-star graphs:
+    a few people in very many movies let bidirectional search meet
+    within a couple of levels, so the bounds prune almost nobody and
+    only add their own cost.
+
     If no possible path, returns None.
     """
+    if mode == "bidirectional":
+        search = costar.bidirectional
+    elif mode == "bfs":
+        search = costar.bfs
+    elif mode == "alt":
+        tables = load_landmarks()
+
+        def search(graph, source, target):
+            return alt.bounded_bidirectional(graph, tables, source, target)
+    else:
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    path, trees = search(
+        graph, graph.person_index[source], graph.person_index[target]
+    )
+
+    # Record how much of the graph the search had to touch
+    stats["expanded"] = sum(tree.expanded for tree in trees)
+    stats["enqueued"] = sum(tree.enqueued for tree in trees)
+
+    if path is None:
+        return None
+    return [
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in path
+    ]
+
+
+def load_landmarks():
+    """
+    Returns the landmark tables for the loaded data, reading them from
+    the snapshot, or building them and adding them to the snapshot.
+    """
+    global landmarks
 
-    # frontier = StackFrontier()
-    frontier = QueueFrontier()
+    if landmarks is None and snapshot_directory is not None:
+        landmarks = snapshot.load_landmarks(snapshot_directory)
 
-    expand = Node(source, None, None)
-    while True:
+    if landmarks is None:
+        landmarks = alt.Landmarks.build(graph)
+        if snapshot_directory is not None:
+            try:
+                snapshot.save_landmarks(snapshot_directory, landmarks)
+            except OSError:
+                pass
 
-        # Get all neighbours of the source
-        neigh = neighbors_for_person(expand.state)
+    return landmarks
 
-        # Add each neighbour to the frontier as a node
-        for person in neigh:
 
-            # Add each neighbour as a node
-            node = Node(person[1], expand, person[0])
+def distance_histograms(sources, workers=None):
+    """
+    Returns a dictionary mapping each person_id in `sources` to a
+    dictionary of {degrees: number of people that many degrees away}.
 
-            # Return early if state is target
-            if node.state == target:
-                return return_film_list(node)
+    Searches run in a pool of `workers` processes that memory-map the
+    graph from the data snapshot instead of being sent a copy of it.
+    Without a snapshot, or with a single worker, they run in this process.
+    """
+    indices = [graph.person_index[source] for source in sources]
 
-            frontier.add(node)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or snapshot_directory is None:
+        histograms = [costar.distance_histogram(graph, i) for i in indices]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(snapshot_directory,)
+        ) as executor:
+            chunksize = max(1, len(indices) // (4 * workers))
+            histograms = list(
+                executor.map(histogram_worker, indices, chunksize=chunksize)
+            )
 
-        # Remove the first neighbour
-        try:
-            pop = frontier.remove()
-        except Exception:
-            # Return None if frontier is empty
-            return None
-        
-        # If node is the target, return solution
-        # if pop.state == target:
-        #     return return_film_list(pop)
+    return dict(zip(sources, histograms))
 
-        # Otherwise, expand the node
-        expand = pop
 
-def return_film_list(current):
+def init_worker(directory):
     """
-    Returns a list of tuples from target to source.
+    Maps the co-star graph from the snapshot of `directory`
+    into a worker process.
     """
-    out = []
+    global graph
+    graph = costar.CoStarGraph(None, None, **snapshot.load_arrays(directory))
+
+
+def histogram_worker(source):
+    """
+    Returns the distance histogram for person index `source`
+    within a worker process.
+    """
+    return costar.distance_histogram(graph, source)
 
-    while current.parent != None:
-        out.append((current.action, current.state))
-        current = current.parent
-    
-    out.reverse()
-    return out
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
-    resolving ambiguities as needed.
+    resolving ambiguities and near misses as needed.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
-        return None
+
+        # Offer the closest names instead of failing on a typo
+        person_ids = [
+            person_id
+            for key in suggest_names(name)
+            for person_id in sorted(names[key])
+        ]
+        if len(person_ids) == 0:
+            return None
+        print(f"No match for '{name}'. Did you mean?")
+        return choose_person(person_ids)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
+        return choose_person(person_ids)
     else:
         return person_ids[0]
 
 
+def choose_person(person_ids):
+    """
+    Lists the people in `person_ids` and returns the one the user picks,
+    or None if they pick none of them.
+    """
+    for person_id in person_ids:
+        person = people[person_id]
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
+def suggest_names(name, limit=5):
+    """
+    Returns up to `limit` keys of `names` that closely resemble `name`,
+    most similar first.
+    """
+    return [key for key, score in name_index.search(name, limit)]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
+    person = graph.person_index[person_id]
+    movie_list, _ = graph.movies_of([person])
+    stars, owners = graph.stars_of(movie_list)
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie, star in zip(movie_list[owners], stars):
+        neighbors.add((graph.movie_ids[movie], graph.person_ids[star]))
     return neighbors
 
 
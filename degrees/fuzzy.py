@@ -0,0 +1,83 @@
+import numpy as np
+
+from costar import compress, gather
+
+
+class NameIndex():
+    """
+    Trigram index over lowercase names, ranking names by the
+    Jaccard similarity of their trigram sets to a query.
+    """
+
+    def __init__(self, keys, trigrams, ptr, postings, sizes):
+        self.keys = keys
+        self.trigrams = trigrams
+        self.trigram_index = {t: i for i, t in enumerate(trigrams)}
+
+        # Names containing trigram i are postings[ptr[i]:ptr[i + 1]]
+        self.ptr = ptr
+        self.postings = postings
+
+        # Number of distinct trigrams in each name
+        self.sizes = sizes
+
+    @classmethod
+    def build(cls, keys):
+        """
+        Builds the index over a list of lowercase names.
+        """
+        trigram_index = {}
+        rows = []
+        cols = []
+        sizes = np.zeros(len(keys), dtype=np.int32)
+
+        for i, key in enumerate(keys):
+            grams = trigrams_of(key)
+            sizes[i] = len(grams)
+            for gram in grams:
+                rows.append(trigram_index.setdefault(gram, len(trigram_index)))
+                cols.append(i)
+
+        ptr, postings = compress(
+            np.array(rows, dtype=np.int32),
+            np.array(cols, dtype=np.int32),
+            len(trigram_index)
+        )
+        return cls(keys, list(trigram_index), ptr, postings, sizes)
+
+    def search(self, name, limit=5):
+        """
+        Returns up to `limit` (name, score) pairs for the indexed names
+        most similar to `name`, best first.
+        """
+        grams = [
+            self.trigram_index[gram] for gram in trigrams_of(name.lower())
+            if gram in self.trigram_index
+        ]
+        if len(grams) == 0:
+            return []
+
+        # Count the trigrams each candidate shares with the query
+        matches, _ = gather(self.ptr, self.postings, grams)
+        candidates, common = np.unique(matches, return_counts=True)
+
+        size = len(trigrams_of(name.lower()))
+        scores = common / (size + self.sizes[candidates] - common)
+
+        if len(candidates) > limit:
+            best = np.argpartition(-scores, limit)[:limit]
+            candidates, scores = candidates[best], scores[best]
+        order = np.argsort(-scores, kind="stable")
+        return [
+            (self.keys[candidates[i]], float(scores[i]))
+            for i in order
+        ]
+
+
+def trigrams_of(name):
+    """
+    Returns the set of trigrams in `name`, padded so that the
+    start and end of the name form trigrams of their own.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,120 @@
+import numpy as np
+
+from costar import SearchTree, bidirectional
+
+
+class Landmarks():
+    """
+    Breadth-first distances from a few landmark people to everyone,
+    giving lower bounds on the distance between any two people
+    by the triangle inequality.
+    """
+
+    def __init__(self, people, dist):
+        # Person index of each landmark
+        self.people = people
+
+        # dist[i, p] is the distance from landmark i to person p, or -1
+        self.dist = dist
+
+    @classmethod
+    def build(cls, graph, count=8):
+        """
+        Picks `count` landmarks spread across the graph, starting from the
+        person in the most movies and then repeatedly taking the reachable
+        person furthest from every landmark chosen so far.
+        """
+        counts = np.diff(graph.person_movies_ptr)
+        person = int(np.argmax(counts))
+
+        people = []
+        rows = []
+        nearest = np.full(graph.num_people, -1, dtype=np.int64)
+
+        for _ in range(min(count, graph.num_people)):
+            tree = SearchTree(graph, person)
+            tree.run()
+            people.append(person)
+            rows.append(tree.dist.astype(np.int16))
+
+            # Track each person's distance to their nearest landmark
+            reached = tree.dist >= 0
+            nearest = np.where(
+                reached & ((nearest < 0) | (tree.dist < nearest)),
+                tree.dist, nearest
+            )
+
+            person = int(np.argmax(nearest))
+            if nearest[person] <= 0:
+                break
+
+        return cls(np.array(people, dtype=np.int32), np.vstack(rows))
+
+    def bound(self, people, target):
+        """
+        Returns a lower bound on the distance from each person in `people`
+        to `target`, or -1 where a landmark proves they are not connected.
+        """
+        to_target = self.dist[:, target][:, np.newaxis].astype(np.int32)
+        to_people = self.dist[:, people].astype(np.int32)
+
+        known = (to_target >= 0) & (to_people >= 0)
+        bounds = np.where(known, np.abs(to_target - to_people), 0).max(axis=0)
+
+        # A landmark reaching only one of the two rules out any path
+        split = ((to_target >= 0) != (to_people >= 0)).any(axis=0)
+        bounds[split] = -1
+        return bounds
+
+
+class BoundedTree(SearchTree):
+    """
+    SearchTree that stops expanding people whose landmark bound shows
+    they cannot lie on a path to `goal` of at most `limit` degrees.
+    """
+
+    def __init__(self, graph, landmarks, source, goal, limit):
+        super().__init__(graph, source)
+        self.landmarks = landmarks
+        self.goal = goal
+        self.limit = limit
+
+    def grow(self):
+        """
+        Expands every person in the current level and returns the
+        people reached for the first time, keeping only those within
+        the limit in the next level.
+        """
+        people = super().grow()
+        if self.limit is not None and len(people) > 0:
+            bounds = self.landmarks.bound(people, self.goal)
+            self.level = people[(bounds >= 0) & (self.depth + bounds <= self.limit)]
+        return people
+
+
+def bounded_bidirectional(graph, landmarks, source, target):
+    """
+    Returns the list of (movie, person) index pairs on a shortest path
+    from `source` to `target`, or None if they are not connected,
+    along with the BoundedTrees grown from each end.
+
+    The trees are grown by `costar.bidirectional`, but each only
+    expands people that the landmark bounds leave on some path no
+    longer than the shortest path through a landmark. Every person on
+    a shortest path passes that test, so the trees still meet on one.
+    """
+    to_source = landmarks.dist[:, source].astype(np.int32)
+    to_target = landmarks.dist[:, target].astype(np.int32)
+
+    # A landmark reaching only one of the two rules out any path
+    if ((to_source >= 0) != (to_target >= 0)).any():
+        return None, []
+
+    # Without a landmark reaching both, nothing can be pruned
+    known = (to_source >= 0) & (to_target >= 0)
+    limit = int((to_source + to_target)[known].min()) if known.any() else None
+
+    return bidirectional(graph, source, target, (
+        BoundedTree(graph, landmarks, source, target, limit),
+        BoundedTree(graph, landmarks, target, source, limit)
+    ))
@@ -0,0 +1,185 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from costar import CoStarGraph
+from fuzzy import NameIndex
+from landmarks import Landmarks
+
+# Bump whenever the layout of the files below changes
+SNAPSHOT_VERSION = 2
+
+# Source files whose modification times a snapshot is tied to
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# CSR arrays of the co-star graph, each stored as its own .npy file
+ARRAYS = ("person_movies_ptr", "person_movies", "movie_people_ptr", "movie_people")
+
+# Arrays of the trigram name index, stored with a "names_" prefix
+NAME_ARRAYS = ("ptr", "postings", "sizes")
+
+# Arrays of the landmark distance tables, written on first use
+LANDMARK_ARRAYS = ("people", "dist")
+
+
+def snapshot_dir(directory):
+    return os.path.join(directory, ".snapshot")
+
+
+def source_mtimes(directory):
+    """
+    Returns the modification time of each source CSV in `directory`.
+    """
+    return {
+        name: os.stat(os.path.join(directory, name)).st_mtime_ns
+        for name in SOURCES
+    }
+
+
+def save(directory, people, movies, graph, name_index):
+    """
+    Writes `people`, `movies`, `graph` and `name_index`
+    to the snapshot of `directory`.
+
+    The snapshot is written to a temporary directory and then moved
+    into place, so files other processes have memory-mapped from an
+    older snapshot are unlinked rather than overwritten underneath them.
+    """
+    path = snapshot_dir(directory)
+    temp = tempfile.mkdtemp(prefix=".snapshot-", dir=directory)
+    try:
+        for name in ARRAYS:
+            np.save(os.path.join(temp, f"{name}.npy"), getattr(graph, name))
+        for name in NAME_ARRAYS:
+            np.save(os.path.join(temp, f"names_{name}.npy"), getattr(name_index, name))
+
+        with open(os.path.join(temp, "names.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "keys": name_index.keys,
+                "trigrams": name_index.trigrams
+            }, f)
+
+        with open(os.path.join(temp, "people.json"), "w", encoding="utf-8") as f:
+            json.dump([
+                [person_id, person["name"], person["birth"]]
+                for person_id, person in people.items()
+            ], f)
+
+        with open(os.path.join(temp, "movies.json"), "w", encoding="utf-8") as f:
+            json.dump([
+                [movie_id, movie["title"], movie["year"]]
+                for movie_id, movie in movies.items()
+            ], f)
+
+        with open(os.path.join(temp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": SNAPSHOT_VERSION,
+                "mtimes": source_mtimes(directory)
+            }, f)
+
+        replace_dir(temp, path)
+    except BaseException:
+        shutil.rmtree(temp, ignore_errors=True)
+        raise
+
+
+def replace_dir(temp, path):
+    """
+    Moves the directory `temp` to `path`, first moving aside and
+    deleting any directory already there.
+    """
+    old = None
+    if os.path.exists(path):
+        old = temp + ".old"
+        os.replace(path, old)
+    os.replace(temp, path)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def load(directory):
+    """
+    Returns (people, movies, graph, name_index) from the snapshot of
+    `directory`, where people and movies are lists of [id, name, birth]
+    and [id, title, year] rows and the graph's arrays are memory-mapped.
+
+    Returns None if there is no snapshot, or it was written by another
+    version or before the source CSVs last changed.
+    """
+    path = snapshot_dir(directory)
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("version") != SNAPSHOT_VERSION:
+        return None
+    if meta.get("mtimes") != source_mtimes(directory):
+        return None
+
+    with open(os.path.join(path, "people.json"), encoding="utf-8") as f:
+        people = json.load(f)
+    with open(os.path.join(path, "movies.json"), encoding="utf-8") as f:
+        movies = json.load(f)
+
+    graph = CoStarGraph(
+        [row[0] for row in people], [row[0] for row in movies],
+        **load_arrays(directory)
+    )
+
+    with open(os.path.join(path, "names.json"), encoding="utf-8") as f:
+        strings = json.load(f)
+    name_index = NameIndex(
+        strings["keys"], strings["trigrams"],
+        *(np.load(os.path.join(path, f"names_{name}.npy")) for name in NAME_ARRAYS)
+    )
+    return people, movies, graph, name_index
+
+
+def load_arrays(directory):
+    """
+    Returns the graph's CSR arrays from the snapshot of `directory`,
+    memory-mapped read-only so processes can share their pages.
+    """
+    path = snapshot_dir(directory)
+    return {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        for name in ARRAYS
+    }
+
+
+def save_landmarks(directory, landmarks):
+    """
+    Adds `landmarks` to the snapshot of `directory`, writing each
+    table to a temporary file renamed into place.
+    """
+    path = snapshot_dir(directory)
+    for name in LANDMARK_ARRAYS:
+        target = os.path.join(path, f"landmarks_{name}.npy")
+        with open(target + ".tmp", "wb") as f:
+            np.save(f, getattr(landmarks, name))
+        os.replace(target + ".tmp", target)
+
+
+def load_landmarks(directory):
+    """
+    Returns the Landmarks stored in the snapshot of `directory`,
+    or None if none have been saved since the snapshot was written
+    or the files cannot be read.
+
+    The tables are small and read on every search step, so they are
+    loaded into memory rather than mapped.
+    """
+    path = snapshot_dir(directory)
+    try:
+        arrays = [
+            np.load(os.path.join(path, f"landmarks_{name}.npy"))
+            for name in LANDMARK_ARRAYS
+        ]
+    except (OSError, ValueError):
+        return None
+    return Landmarks(*arrays)
@@ -0,0 +1,129 @@
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from bayesnet import FactorTables, JunctionTree, family_structure
+from heredity import PROBS, load_data
+
+# Family files handed to a worker process at a time
+FAMILIES_PER_TASK = 32
+
+# Columns of CSV output, one row per person
+FIELDS = ("family", "name", "gene_2", "gene_1", "gene_0", "trait_true", "trait_false")
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit("Usage: python batch.py directory|manifest [output] [workers]")
+    paths = family_paths(sys.argv[1])
+    output = sys.argv[2] if len(sys.argv) >= 3 else "-"
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    results = score_all(paths, workers)
+    if output == "-":
+        write_jsonl(sys.stdout, results)
+    elif output.endswith(".csv"):
+        with open(output, "w", encoding="utf-8", newline="") as f:
+            write_csv(f, results)
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            write_jsonl(f, results)
+
+
+def family_paths(source):
+    """
+    Returns the paths of the family CSVs to score: every .csv file in
+    `source` if it is a directory, or else every path listed in the
+    manifest file `source`, one per line, relative to the manifest.
+    """
+    if os.path.isdir(source):
+        with os.scandir(source) as entries:
+            return sorted(
+                entry.path for entry in entries
+                if entry.name.endswith(".csv") and entry.is_file()
+            )
+
+    base = os.path.dirname(source)
+    with open(source, encoding="utf-8") as f:
+        return [
+            os.path.join(base, line.strip()) for line in f
+            if line.strip() and not line.startswith("#")
+        ]
+
+
+# Junction trees compiled by this process, keyed by family structure
+compiled = {}
+
+# Probability tables shared by every family this process scores
+tables = FactorTables(PROBS)
+
+
+def score(path):
+    """
+    Returns a result dictionary for the family CSV at `path`, with the
+    probabilities `heredity.main` prints, or an error message.
+
+    The junction tree of every family structure seen by this process
+    is kept, so families of the same shape are only compiled once, and
+    the probability tables are built once and shared by every family.
+    """
+    result = {"family": path}
+    try:
+        people = load_data(path)
+        structure = family_structure(people)
+    except (OSError, KeyError, ValueError, csv.Error) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    tree = compiled.get(structure)
+    if tree is None:
+        tree = compiled[structure] = JunctionTree.from_structure(structure)
+    result["probabilities"] = tree.infer(people, PROBS, tables)
+    return result
+
+
+def score_all(paths, workers=None):
+    """
+    Yields a result dictionary for each family CSV in `paths`, in order,
+    scoring them across a pool of `workers` processes.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= FAMILIES_PER_TASK:
+        yield from map(score, paths)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(score, paths, chunksize=FAMILIES_PER_TASK)
+
+
+def write_jsonl(f, results):
+    """
+    Writes each result to `f` as a line of JSON.
+    """
+    for result in results:
+        f.write(json.dumps(result) + "\n")
+
+
+def write_csv(f, results):
+    """
+    Writes a row to `f` for every person in each result, reporting
+    families that could not be scored on standard error.
+    """
+    writer = csv.writer(f)
+    writer.writerow(FIELDS)
+    for result in results:
+        if "error" in result:
+            print(f"{result['family']}: {result['error']}", file=sys.stderr)
+            continue
+        for name, person in result["probabilities"].items():
+            writer.writerow([
+                result["family"], name,
+                *(person["gene"][g] for g in (2, 1, 0)),
+                person["trait"][True], person["trait"][False]
+            ])
+
+
+if __name__ == "__main__":
+    main()
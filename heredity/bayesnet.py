@@ -0,0 +1,359 @@
+import heapq
+
+import numpy as np
+
+
+class JunctionTree():
+    """
+    Junction tree over the gene variables of a family, compiled from the
+    family's structure alone so it can be reused for any trait evidence,
+    and for any other family listed in the same shape.
+
+    Each person's gene count has a factor over themselves and their
+    parents, and their trait is folded into it as a likelihood, so only
+    gene variables need to appear in the tree.
+    """
+
+    def __init__(self, parents, cliques, parent, home):
+
+        # Indices of each person's (mother, father), or None for founders
+        self.parents = parents
+
+        # cliques[k] is a tuple of person indices whose first entry is
+        # the person eliminated at step k, and whose other entries form
+        # the separator with clique parent[k] (None for a root)
+        self.cliques = cliques
+        self.parent = parent
+
+        # Clique each person's family factor is multiplied into
+        self.home = home
+
+    @classmethod
+    def compile(cls, people):
+        """
+        Builds the tree for the family in `people`, as returned by
+        `heredity.load_data`, reading only names and parents.
+        """
+        return cls.from_structure(family_structure(people))
+
+    @classmethod
+    def from_structure(cls, parents):
+        """
+        Builds the tree for a family given each person's (mother, father)
+        indices, or None for people whose parents are unknown.
+        """
+        neighbours = moral_graph(parents)
+        order = elimination_order(neighbours)
+        position = {v: k for k, v in enumerate(order)}
+
+        # Eliminating v leaves a clique of v and its remaining neighbours,
+        # which hands its separator on to the first of them eliminated
+        cliques = []
+        parent = []
+        for v in order:
+            rest = sorted(neighbours[v], key=position.get)
+            cliques.append((v,) + tuple(rest))
+            parent.append(position[rest[0]] if rest else None)
+            for a in rest:
+                neighbours[a].discard(v)
+                neighbours[a].update(b for b in rest if b != a)
+
+        # Each family factor fits in the clique of its first member eliminated
+        home = [
+            min(position[a] for a in (i,) + (pair or ()))
+            for i, pair in enumerate(parents)
+        ]
+        return cls(parents, cliques, parent, home)
+
+    def infer(self, people, probs, tables=None):
+        """
+        Returns each person's gene and trait distributions given the
+        traits known in `people`, in the structure `heredity.main` prints,
+        using the probability tables in `probs`.
+
+        `tables` may give the FactorTables already built from `probs`,
+        to share them between families. `people` must list its family
+        in the order the tree was compiled from, though names may differ.
+        """
+        names = list(people)
+        if len(names) != len(self.parents):
+            raise ValueError("Family does not match the compiled structure")
+        if tables is None:
+            tables = FactorTables(probs)
+
+        potentials = [np.ones((3,) * len(clique)) for clique in self.cliques]
+        for i, name in enumerate(names):
+            scope, table = tables.family_factor(i, self.parents[i])
+            k = self.home[i]
+            potentials[k] = multiply(potentials[k], self.cliques[k], table, scope)
+            trait = people[name]["trait"]
+            if trait is not None:
+                likelihood = tables.traits[:, int(trait)]
+                potentials[k] = multiply(
+                    potentials[k], self.cliques[k], likelihood, (i,)
+                )
+
+        # Collect towards the roots, children always preceding parents
+        upward = [None] * len(self.cliques)
+        for k, clique in enumerate(self.cliques):
+            if self.parent[k] is None:
+                continue
+            message = potentials[k].sum(axis=0)
+            upward[k] = message / message.sum()
+            p = self.parent[k]
+            potentials[p] = multiply(
+                potentials[p], self.cliques[p], upward[k], clique[1:]
+            )
+
+        # Distribute back out, dividing out what each clique sent up
+        for k in reversed(range(len(self.cliques))):
+            p = self.parent[k]
+            if p is not None:
+                clique = self.cliques[k]
+                message = marginal(potentials[p], self.cliques[p], clique[1:])
+                message = np.divide(
+                    message / message.sum(), upward[k],
+                    out=np.zeros_like(message), where=upward[k] > 0
+                )
+                potentials[k] = multiply(potentials[k], clique, message, clique[1:])
+            potentials[k] = potentials[k] / potentials[k].sum()
+
+        gene = np.zeros((len(names), 3))
+        for k, clique in enumerate(self.cliques):
+            gene[clique[0]] = marginal(potentials[k], clique, clique[:1])
+        return distributions(people, gene, probs)
+
+
+class FactorTables():
+    """
+    Probability tables of the heredity model, built once from `probs`
+    and shared by every family inferred with them.
+    """
+
+    def __init__(self, probs):
+        self.prior = gene_prior(probs)
+        self.inherited = child_table(probs)
+        self.traits = trait_table(probs)
+
+    def family_factor(self, i, parents):
+        """
+        Returns (scope, table) for the probability of person `i`'s gene
+        count, given their parents' gene counts if `parents` is a
+        (mother, father) pair.
+        """
+        if parents is None:
+            return (i,), self.prior
+        return (i,) + tuple(parents), self.inherited
+
+
+def family_structure(people):
+    """
+    Returns each person's (mother, father) indices in `people` as a tuple,
+    with None for people whose parents are unknown. Families that list
+    people in the same shape share a structure, whatever their names.
+    """
+    index = {name: i for i, name in enumerate(people)}
+    return tuple(
+        (index[person["mother"]], index[person["father"]])
+        if person["mother"] is not None else None
+        for person in people.values()
+    )
+
+
+def parents_first(parents):
+    """
+    Returns the indices of a family's people ordered so that everyone
+    comes after their parents, given the family's `family_structure`.
+    """
+    order = []
+    placed = [False] * len(parents)
+    for person in range(len(parents)):
+        stack = [person]
+        while stack:
+            current = stack[-1]
+            if placed[current]:
+                stack.pop()
+                continue
+            waiting = [
+                parent for parent in (parents[current] or ())
+                if not placed[parent]
+            ]
+            if waiting:
+                stack.extend(waiting)
+            else:
+                placed[current] = True
+                order.append(current)
+                stack.pop()
+    return order
+
+
+def junction_tree(people, probs):
+    """
+    Returns each person's gene and trait distributions by compiling
+    and calibrating a junction tree for `people`.
+    """
+    return JunctionTree.compile(people).infer(people, probs)
+
+
+def moral_graph(parents):
+    """
+    Returns each person's set of neighbours in the moral graph of a
+    family, which connects everyone in a family factor to each other:
+    a person's parents, children and the other parents of their children.
+    """
+    neighbours = [set() for _ in parents]
+    for i, pair in enumerate(parents):
+        scope = (i,) + (pair or ())
+        for a in scope:
+            neighbours[a].update(b for b in scope if b != a)
+    return neighbours
+
+
+def elimination_order(neighbours):
+    """
+    Returns an order to eliminate the vertices of the undirected graph
+    `neighbours` in, greedily picking the vertex whose elimination adds
+    the fewest fill-in edges. `neighbours` is left unchanged.
+    """
+    neighbours = [set(adjacent) for adjacent in neighbours]
+    scores = [fill_in(neighbours, v) for v in range(len(neighbours))]
+    heap = [(score, v) for v, score in enumerate(scores)]
+    heapq.heapify(heap)
+    eliminated = [False] * len(neighbours)
+    order = []
+
+    while heap:
+        score, v = heapq.heappop(heap)
+        if eliminated[v] or score != scores[v]:
+            continue
+        eliminated[v] = True
+        order.append(v)
+
+        rest = neighbours[v]
+        for a in rest:
+            neighbours[a].discard(v)
+            neighbours[a].update(b for b in rest if b != a)
+
+        # Only vertices within two steps of v can have a new score
+        affected = set(rest)
+        for a in rest:
+            affected.update(neighbours[a])
+        for a in affected:
+            scores[a] = fill_in(neighbours, a)
+            heapq.heappush(heap, (scores[a], a))
+
+    return order
+
+
+def fill_in(neighbours, v):
+    """
+    Returns the number of edges eliminating `v` would add.
+    """
+    adjacent = list(neighbours[v])
+    return sum(
+        1 for i, a in enumerate(adjacent) for b in adjacent[i + 1:]
+        if b not in neighbours[a]
+    )
+
+
+def inheritance(probs):
+    """
+    Returns the probability of passing the gene on for a parent
+    with 0, 1 or 2 copies of it.
+    """
+    mutation = probs["mutation"]
+    return np.array([mutation, 0.5, 1 - mutation])
+
+
+def gene_prior(probs):
+    """
+    Returns the probability of 0, 1 or 2 copies of the gene
+    for someone whose parents are unknown.
+    """
+    return np.array([probs["gene"][g] for g in range(3)])
+
+
+def child_table(probs):
+    """
+    Returns the 3 x 3 x 3 array whose entry [c, m, f] is the probability
+    of a child having c copies of the gene when their mother has m
+    copies and their father has f copies.
+    """
+    passed = inheritance(probs)
+    carried = np.stack([1 - passed, passed])
+    table = np.zeros((3, 3, 3))
+    for a in range(2):
+        for b in range(2):
+            table[a + b] += np.outer(carried[a], carried[b])
+    return table
+
+
+def trait_table(probs):
+    """
+    Returns the 3 x 2 array whose entry [g, t] is the probability
+    of the trait being t (0 or 1) given g copies of the gene.
+    """
+    return np.array([
+        [probs["trait"][g][False], probs["trait"][g][True]] for g in range(3)
+    ])
+
+
+def trait_likelihood(trait, probs):
+    """
+    Returns the probability of the known `trait` for each gene count,
+    or ones if the trait is unknown.
+    """
+    if trait is None:
+        return np.ones(3)
+    return np.array([probs["trait"][g][trait] for g in range(3)])
+
+
+def evidence(people, probs):
+    """
+    Returns the n x 3 array of each person's probability of their known
+    trait given each gene count, which is 1 for unknown traits.
+    """
+    return np.array([
+        trait_likelihood(person["trait"], probs) for person in people.values()
+    ]).reshape(len(people), 3)
+
+
+def distributions(people, gene, probs):
+    """
+    Returns the gene and trait distributions `heredity.main` prints,
+    from the n x 3 array `gene` of each person's gene count distribution.
+
+    Known traits are certain, and unknown traits follow from the gene count.
+    """
+    has_trait = gene @ trait_table(probs)[:, 1]
+    probabilities = {}
+    for i, (name, person) in enumerate(people.items()):
+        p = float(has_trait[i]) if person["trait"] is None else float(person["trait"])
+        probabilities[name] = {
+            "gene": {g: float(gene[i, g]) for g in (2, 1, 0)},
+            "trait": {True: p, False: 1 - p}
+        }
+    return probabilities
+
+
+def multiply(table, scope, factor, factor_scope):
+    """
+    Returns `table` over `scope` multiplied by `factor`
+    over `factor_scope`, a subset of `scope`.
+    """
+    axes = {v: n for n, v in enumerate(scope)}
+    return np.einsum(
+        table, list(range(len(scope))),
+        factor, [axes[v] for v in factor_scope],
+        list(range(len(scope)))
+    )
+
+
+def marginal(table, scope, variables):
+    """
+    Returns `table` over `scope` summed down to `variables`.
+    """
+    axes = {v: n for n, v in enumerate(scope)}
+    return np.einsum(
+        table, list(range(len(scope))), [axes[v] for v in variables]
+    )
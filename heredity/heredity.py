@@ -2,6 +2,10 @@ import csv
 import itertools
 import sys
 
+from bayesnet import family_structure, junction_tree, parents_first
+from sampling import SAMPLES, gibbs, likelihood_weighting
+from vectorised import vectorised_probabilities
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -40,9 +44,36 @@ PROBS = {
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit("Usage: python heredity.py data.csv [method] [samples]")
     people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) >= 3 else "junction"
+    if method not in METHODS:
+        sys.exit(f"Unknown method {method}, choose from: {', '.join(METHODS)}")
+
+    # Compute gene and trait probabilities for each person
+    if len(sys.argv) == 4:
+        if method not in SAMPLERS:
+            sys.exit(f"Only {', '.join(SAMPLERS)} take a number of samples")
+        probabilities = METHODS[method](people, int(sys.argv[3]))
+    else:
+        probabilities = METHODS[method](people)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def enumerate_probabilities(people):
+    """
+    Return each person's gene and trait distributions by summing the
+    joint probability of every assignment consistent with the evidence.
+    """
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -60,38 +91,71 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Add up every assignment the evidence allows, skipping the rest
+    for one_gene, two_genes, have_trait, p in assignments(people):
+        update(probabilities, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+
+def junction_probabilities(people):
+    """
+    Return each person's gene and trait distributions by message passing
+    over a junction tree, in time linear in the size of tree-shaped families.
+    """
+    return junction_tree(people, PROBS)
+
+
+def batch_probabilities(people):
+    """
+    Return each person's gene and trait distributions by scoring every
+    assignment of gene counts in NumPy batches.
+    """
+    return vectorised_probabilities(people, PROBS)
+
+
+def weighted_probabilities(people, samples=SAMPLES):
+    """
+    Return each person's gene and trait distributions estimated by
+    likelihood weighting, reporting the effective sample size.
+    """
+    diagnostics = {}
+    probabilities = likelihood_weighting(
+        people, PROBS, samples, diagnostics=diagnostics
+    )
+    print(f"Effective sample size {diagnostics['effective']:.0f} "
+          f"of {diagnostics['samples']}", file=sys.stderr)
+    return probabilities
+
+
+def gibbs_probabilities(people, samples=SAMPLES):
+    """
+    Return each person's gene and trait distributions estimated by
+    Gibbs sampling, reporting the worst R-hat across the chains.
+    """
+    diagnostics = {}
+    probabilities = gibbs(people, PROBS, samples, diagnostics=diagnostics)
+    print(f"{diagnostics['chains']} chains of {diagnostics['sweeps']} sweeps, "
+          f"worst R-hat {diagnostics['rhat']:.3f} ({diagnostics['worst']})",
+          file=sys.stderr)
+    return probabilities
+
+
+# Sampling methods, which take a number of samples
+SAMPLERS = {
+    "likelihood": weighted_probabilities,
+    "gibbs": gibbs_probabilities
+}
+
+# Inference methods selectable from the command line
+METHODS = {
+    "junction": junction_probabilities,
+    "enumerate": enumerate_probabilities,
+    "vectorised": batch_probabilities,
+    **SAMPLERS
+}
 
 
 def load_data(filename):
@@ -118,14 +182,76 @@ def load_data(filename):
 
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Yield all possible subsets of set s, one at a time.
     """
     s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    for subset in itertools.chain.from_iterable(
+        itertools.combinations(s, r) for r in range(len(s) + 1)
+    ):
+        yield set(subset)
+
+
+def assignments(people):
+    """
+    Yield (one_gene, two_genes, have_trait, p) for every assignment of
+    gene counts and traits with non-zero joint probability p that agrees
+    with the known traits in `people`.
+
+    People are assigned parents first, so each person's probability can
+    be multiplied into a running product as soon as they are assigned,
+    and a branch is abandoned as soon as its product reaches zero.
+    """
+    names = list(people)
+    order = [names[i] for i in parents_first(family_structure(people))]
+    position = {person: k for k, person in enumerate(order)}
+    mutation = PROBS["mutation"]
+    passed = {0: mutation, 1: 0.5, 2: 1 - mutation}
+
+    # Gene count and trait chosen for the person at each position so far
+    genes = [0] * len(order)
+    traits = [False] * len(order)
+
+    # Depth-first search, where an entry gives a person's gene count and
+    # trait along with the joint probability of everyone assigned so far
+    stack = [(-1, 0, False, 1)]
+    while stack:
+        k, gene, trait, p = stack.pop()
+        if k >= 0:
+            genes[k] = gene
+            traits[k] = trait
+
+        if k == len(order) - 1:
+            yield (
+                {order[i] for i in range(len(order)) if genes[i] == 1},
+                {order[i] for i in range(len(order)) if genes[i] == 2},
+                {order[i] for i in range(len(order)) if traits[i]},
+                p
+            )
+            continue
+
+        person = people[order[k + 1]]
+        if person["mother"] is None:
+            gene_probs = PROBS["gene"]
+        else:
+            mother = passed[genes[position[person["mother"]]]]
+            father = passed[genes[position[person["father"]]]]
+            gene_probs = {
+                2: mother * father,
+                1: mother * (1 - father) + father * (1 - mother),
+                0: (1 - mother) * (1 - father)
+            }
+
+        # Only traits matching the evidence are tried
+        if person["trait"] is None:
+            choices = (True, False)
+        else:
+            choices = (person["trait"],)
+
+        for gene, gene_prob in gene_probs.items():
+            for trait in choices:
+                q = p * gene_prob * PROBS["trait"][gene][trait]
+                if q > 0:
+                    stack.append((k + 1, gene, trait, q))
 
 
 def joint_probability(people, one_gene, two_genes, have_trait):
@@ -0,0 +1,234 @@
+import numpy as np
+
+from bayesnet import (
+    child_table, distributions, evidence, family_structure, gene_prior,
+    moral_graph, parents_first
+)
+
+# Default number of samples drawn by either sampler
+SAMPLES = 20000
+
+# Samples drawn together in one batch by likelihood weighting
+BATCH_SIZE = 1 << 14
+
+# Default number of Gibbs chains run side by side
+CHAINS = 64
+
+
+def likelihood_weighting(people, probs, samples=SAMPLES, seed=None,
+                         diagnostics=None, batch_size=BATCH_SIZE):
+    """
+    Returns each person's gene and trait distributions in the structure
+    `heredity.main` prints, estimated from `samples` gene assignments
+    drawn parents first from the model, each weighted by the probability
+    of the known traits.
+
+    If `diagnostics` is a dictionary, the effective sample size is
+    stored in it, which falls far below `samples` when the evidence is
+    unlikely under the model.
+    """
+    rng = np.random.default_rng(seed)
+    parents = family_structure(people)
+    order = parents_first(parents)
+    log_likelihood = np.log(evidence(people, probs))
+    n = len(parents)
+
+    # Weighted totals, kept relative to the largest log weight seen so
+    # far so that weights of large families do not underflow
+    totals = np.zeros((n, 3))
+    weight_sum = 0.0
+    weight_squares = 0.0
+    shift = -np.inf
+
+    for start in range(0, samples, batch_size):
+        size = min(batch_size, samples - start)
+        genes = forward_sample(rng, size, order, parents, probs)
+        log_weights = log_likelihood[np.arange(n), genes].sum(axis=1)
+
+        top = log_weights.max()
+        if top > shift:
+            rescale = np.exp(shift - top)
+            totals *= rescale
+            weight_sum *= rescale
+            weight_squares *= rescale ** 2
+            shift = top
+
+        weights = np.exp(log_weights - shift)
+        for g in range(3):
+            totals[:, g] += weights @ (genes == g)
+        weight_sum += weights.sum()
+        weight_squares += (weights ** 2).sum()
+
+    if diagnostics is not None:
+        diagnostics["samples"] = samples
+        diagnostics["effective"] = weight_sum ** 2 / weight_squares
+
+    return distributions(people, totals / weight_sum, probs)
+
+
+def gibbs(people, probs, samples=SAMPLES, chains=CHAINS, burn_in=None,
+          seed=None, diagnostics=None):
+    """
+    Returns each person's gene and trait distributions in the structure
+    `heredity.main` prints, estimated by Gibbs sampling gene counts with
+    `chains` chains advanced together, each keeping samples // chains
+    sweeps after `burn_in` sweeps (by default half as many again).
+
+    Every sweep resamples each person's gene count given everyone else's,
+    and averages the distribution it was drawn from rather than the draw.
+    People who share no factor are resampled together, so a sweep takes
+    a handful of array operations however large the family.
+
+    If `diagnostics` is a dictionary, the number of sweeps and the largest
+    Gelman-Rubin R-hat over all people and gene counts are stored in it,
+    along with the name of the person it belongs to. Values near 1 show
+    the chains agree.
+    """
+    rng = np.random.default_rng(seed)
+    parents = family_structure(people)
+    names = list(people)
+    n = len(parents)
+    kept = max(2, -(-samples // chains))
+    if burn_in is None:
+        burn_in = kept // 2
+
+    log_prior = np.log(gene_prior(probs))
+    log_inherited = np.log(child_table(probs))
+    log_likelihood = np.log(evidence(people, probs))
+    blocks = independent_blocks(parents)
+
+    # Start each chain from a draw from the model without evidence
+    genes = forward_sample(rng, chains, parents_first(parents), parents, probs)
+    counts = np.arange(3)
+
+    # Per-chain sums of each conditional distribution, and of its squares
+    sums = np.zeros((chains, n, 3))
+    squares = np.zeros((chains, n, 3))
+
+    for sweep in range(burn_in + kept):
+        for block in blocks:
+            members = block["members"]
+            log_p = np.empty((chains, len(members), 3))
+            log_p[:, block["founders"]] = log_prior
+            log_p[:, block["children"]] = log_inherited[
+                :, genes[:, block["mothers"]], genes[:, block["fathers"]]
+            ].transpose(1, 2, 0)
+            log_p += log_likelihood[members]
+
+            # Each child's inheritance given each possible count for
+            # the parent being resampled, added to that parent's row
+            child, other, row = block["as_mother"]
+            np.add.at(log_p, (slice(None), row), log_inherited[
+                genes[:, child][..., None], counts, genes[:, other][..., None]
+            ])
+            child, other, row = block["as_father"]
+            np.add.at(log_p, (slice(None), row), log_inherited[
+                genes[:, child][..., None], genes[:, other][..., None], counts
+            ])
+
+            p = np.exp(log_p - log_p.max(axis=2, keepdims=True))
+            p /= p.sum(axis=2, keepdims=True)
+            genes[:, members] = draw(rng, p.reshape(-1, 3)).reshape(chains, -1)
+
+            if sweep >= burn_in:
+                sums[:, members] += p
+                squares[:, members] += p ** 2
+
+    if diagnostics is not None:
+        rhat = gelman_rubin(sums, squares, kept)
+        worst = np.unravel_index(np.argmax(rhat), rhat.shape) if n else None
+        diagnostics["chains"] = chains
+        diagnostics["sweeps"] = kept
+        diagnostics["burn_in"] = burn_in
+        diagnostics["blocks"] = len(blocks)
+        diagnostics["rhat"] = float(rhat[worst]) if n else 1.0
+        diagnostics["worst"] = names[worst[0]] if n else None
+
+    gene = sums.sum(axis=0)
+    return distributions(people, gene / gene.sum(axis=1, keepdims=True), probs)
+
+
+def independent_blocks(parents):
+    """
+    Returns the people of a family split into blocks that share no
+    factor, by greedily colouring its moral graph, so that everyone in
+    a block can be resampled at once given everyone else.
+
+    Each block is a dictionary of index arrays: its members; the rows of
+    its founders and children, with the children's mothers and fathers;
+    and, for each time a member is the mother (or father) of a child,
+    the child, the child's other parent and the member's row.
+    """
+    neighbours = moral_graph(parents)
+    colour = [-1] * len(parents)
+    for person in parents_first(parents):
+        taken = {colour[a] for a in neighbours[person]}
+        colour[person] = next(c for c in range(len(taken) + 1) if c not in taken)
+
+    blocks = []
+    for c in range(max(colour, default=-1) + 1):
+        members = [i for i in range(len(parents)) if colour[i] == c]
+        row = {i: r for r, i in enumerate(members)}
+        founders = [r for r, i in enumerate(members) if parents[i] is None]
+        children = [r for r, i in enumerate(members) if parents[i] is not None]
+        roles = ([], [])
+        for child, pair in enumerate(parents):
+            for role in (0, 1):
+                if pair is not None and pair[role] in row:
+                    roles[role].append((child, pair[1 - role], row[pair[role]]))
+        blocks.append({
+            "members": np.array(members, dtype=np.int64),
+            "founders": np.array(founders, dtype=np.int64),
+            "children": np.array(children, dtype=np.int64),
+            "mothers": np.array(
+                [parents[members[r]][0] for r in children], dtype=np.int64
+            ),
+            "fathers": np.array(
+                [parents[members[r]][1] for r in children], dtype=np.int64
+            ),
+            "as_mother": np.array(roles[0], dtype=np.int64).reshape(-1, 3).T,
+            "as_father": np.array(roles[1], dtype=np.int64).reshape(-1, 3).T
+        })
+    return blocks
+
+
+def gelman_rubin(sums, squares, kept):
+    """
+    Returns the potential scale reduction factor R-hat for each person and
+    gene count, from per-chain sums and sums of squares of `kept` values.
+    """
+    chains = sums.shape[0]
+    means = sums / kept
+    within = ((squares - kept * means ** 2) / (kept - 1)).mean(axis=0)
+    between = kept * means.var(axis=0, ddof=1) if chains > 1 else 0
+    pooled = (kept - 1) / kept * within + between / kept
+
+    # Values that never vary in any chain have converged trivially
+    return np.sqrt(np.divide(
+        pooled, within, out=np.ones_like(within), where=within > 1e-300
+    ))
+
+
+def forward_sample(rng, size, order, parents, probs):
+    """
+    Returns a size x n array of gene counts drawn from the model without
+    evidence, assigning people in `order`, which puts parents first.
+    """
+    prior = gene_prior(probs)
+    inherited = child_table(probs)
+    genes = np.zeros((size, len(parents)), dtype=np.int64)
+    for i in order:
+        if parents[i] is None:
+            genes[:, i] = rng.choice(3, size=size, p=prior)
+        else:
+            mother, father = parents[i]
+            genes[:, i] = draw(rng, inherited[:, genes[:, mother], genes[:, father]].T)
+    return genes
+
+
+def draw(rng, p):
+    """
+    Returns one draw from each row of the distributions in `p`.
+    """
+    u = rng.random((len(p), 1))
+    return np.minimum((u > np.cumsum(p, axis=1)).sum(axis=1), p.shape[1] - 1)
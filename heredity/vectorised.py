@@ -0,0 +1,71 @@
+import numpy as np
+
+from bayesnet import (
+    child_table, distributions, evidence, family_structure, gene_prior
+)
+
+# Gene assignments scored together in one batch
+BATCH_SIZE = 1 << 16
+
+
+def gene_assignments(n, start, stop):
+    """
+    Returns the (stop - start) x n array of gene counts numbered start
+    to stop - 1, reading each number's base-3 digits as one count per person.
+    """
+    codes = np.arange(start, stop, dtype=np.int64)
+    return (codes[:, None] // 3 ** np.arange(n, dtype=np.int64)) % 3
+
+
+def batch_joint_probability(genes, parents, likelihood, probs):
+    """
+    Returns the joint probability of each row of gene counts in `genes`
+    together with the known traits, as an array.
+
+    `parents` holds each person's (mother, father) indices, or None for
+    people whose parents are unknown. `likelihood` is the n x 3 array of
+    each person's probability of their known trait given each gene count,
+    which is 1 for unknown traits, as they sum out of the joint probability.
+    """
+    prior = gene_prior(probs)
+    inherited = child_table(probs)
+    n = genes.shape[1]
+
+    # Founders draw from the prior and children from their parents' genes
+    founders = [i for i in range(n) if parents[i] is None]
+    children = [i for i in range(n) if parents[i] is not None]
+    p = prior[genes[:, founders]].prod(axis=1)
+    if children:
+        mothers = [parents[i][0] for i in children]
+        fathers = [parents[i][1] for i in children]
+        p *= inherited[
+            genes[:, children], genes[:, mothers], genes[:, fathers]
+        ].prod(axis=1)
+
+    return p * likelihood[np.arange(n), genes].prod(axis=1)
+
+
+def vectorised_probabilities(people, probs, batch_size=BATCH_SIZE):
+    """
+    Returns each person's gene and trait distributions in the structure
+    `heredity.main` prints, scoring every assignment of gene counts in
+    batches of `batch_size` with NumPy.
+
+    Unknown traits are never enumerated: each gene assignment already
+    stands for every way of filling them in, and their distributions
+    follow from the gene distributions.
+    """
+    n = len(people)
+    parents = family_structure(people)
+    likelihood = evidence(people, probs)
+
+    # Total joint probability of each person having each gene count
+    totals = np.zeros((n, 3))
+    for start in range(0, 3 ** n, batch_size):
+        genes = gene_assignments(n, start, min(start + batch_size, 3 ** n))
+        p = batch_joint_probability(genes, parents, likelihood, probs)
+        for g in range(3):
+            totals[:, g] += p @ (genes == g)
+
+    gene = totals / totals.sum(axis=1, keepdims=True)
+    return distributions(people, gene, probs)
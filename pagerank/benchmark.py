@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+from pagerank import DAMPING, crawl, sample_pagerank
+from linkgraph import LinkGraph
+from outofcore import edge_pagerank, write_edges
+from solvers import SOLVERS, power_iteration
+
+# Seed for both the synthetic corpus and the samplers
+SEED = 50
+
+# Exponent of the power law giving each page's share of incoming links
+ALPHA = 0.8
+
+# Average number of links on a page
+LINKS = 8
+
+# Pages per site, and the share of links that stay within a page's site,
+# so rank mixes slowly between sites as it does across real link graphs
+SITE_SIZE = 200
+LOCAL = 0.95
+
+# Residual the reference solution is iterated down to
+REFERENCE_TOLERANCE = 1e-12
+
+# Tolerance every solver is timed at
+TOLERANCE = 1e-6
+
+# Samplers timed by the benchmark, as (label, walkers, workers)
+SAMPLERS = (
+    ("sample", 1, 1),
+    ("sample x1024", 1024, 1),
+    ("sample x1024 /4", 1024, 4)
+)
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python benchmark.py pages [samples]")
+    num_pages = int(sys.argv[1])
+    samples = int(sys.argv[2]) if len(sys.argv) == 3 else 100000
+
+    directory = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "synthetic", str(num_pages)
+    )
+    if not os.path.exists(os.path.join(directory, "page0.html")):
+        print(f"Generating {num_pages} pages in {directory}...")
+        start = time.perf_counter()
+        generate(directory, num_pages)
+        print(f"Generated in {time.perf_counter() - start:.2f}s.")
+
+    start = time.perf_counter()
+    corpus = crawl(directory)
+    print(f"Crawled in {time.perf_counter() - start:.2f}s.")
+
+    start = time.perf_counter()
+    graph = LinkGraph.from_corpus(corpus)
+    matrix = graph.transition_matrix()
+    dangling = graph.dangling()
+    print(f"Built matrix in {time.perf_counter() - start:.2f}s, "
+          f"{len(graph)} pages, {matrix.nnz} links, {dangling.sum()} dangling.")
+
+    reference, _ = power_iteration(
+        matrix, dangling, DAMPING, tolerance=REFERENCE_TOLERANCE
+    )
+
+    print(f"  {'method':<18}{'seconds':>10}{'iterations':>12}{'L1 error':>12}")
+    for method, solver in SOLVERS.items():
+        start = time.perf_counter()
+        ranks, iterations = solver(matrix, dangling, DAMPING, tolerance=TOLERANCE)
+        seconds = time.perf_counter() - start
+        error = np.abs(ranks - reference).sum()
+        print(f"  {method:<18}{seconds:>10.3f}{iterations:>12}{error:>12.2e}")
+
+    # Out-of-core iteration reads the edges back from disk every sweep
+    edges = os.path.join(directory, ".edges")
+    write_edges(directory, edges)
+    start = time.perf_counter()
+    ranks, iterations = edge_pagerank(edges, DAMPING, tolerance=TOLERANCE)
+    seconds = time.perf_counter() - start
+    error = np.abs(ranks - reference).sum()
+    print(f"  {'out-of-core':<18}{seconds:>10.3f}{iterations:>12}{error:>12.2e}")
+
+    print(f"  {'sampler':<18}{'seconds':>10}{'samples':>12}{'L1 error':>12}")
+    for label, walkers, workers in SAMPLERS:
+        start = time.perf_counter()
+        ranks = sample_pagerank(
+            corpus, DAMPING, samples, walkers=walkers, workers=workers, seed=SEED
+        )
+        seconds = time.perf_counter() - start
+        error = np.abs(to_vector(graph, ranks) - reference).sum()
+        print(f"  {label:<18}{seconds:>10.3f}{samples:>12}{error:>12.2e}")
+
+
+def generate(directory, num_pages, seed=SEED):
+    """
+    Writes `num_pages` HTML pages to `directory`, linking to each other
+    with a power-law distribution of incoming links, mostly within
+    sites of SITE_SIZE pages.
+
+    page0.html is written last, so its presence marks a complete corpus.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # Draw how many links each page has, some having none at all,
+    # then draw each link's target in proportion to a power-law weight
+    degree = rng.geometric(1 / (LINKS + 1), size=num_pages) - 1
+    weights = np.arange(1, num_pages + 1, dtype=np.float64) ** -ALPHA
+    weights /= weights.sum()
+    targets = rng.choice(num_pages, size=degree.sum(), p=weights)
+
+    # Redraw most targets from the same power law within the linking page's site
+    sources = np.repeat(np.arange(num_pages), degree)
+    local = rng.random(len(targets)) < LOCAL
+    site_start = sources[local] // SITE_SIZE * SITE_SIZE
+    site_size = np.minimum(SITE_SIZE, num_pages - site_start)
+    site_weights = np.arange(1, SITE_SIZE + 1, dtype=np.float64) ** -ALPHA
+    cumulative = np.cumsum(site_weights)
+    offsets = np.searchsorted(
+        cumulative, rng.random(local.sum()) * cumulative[site_size - 1], side="right"
+    )
+    targets[local] = site_start + offsets
+
+    # Shuffle pages so popularity is not tied to name order
+    names = rng.permutation(num_pages)
+    ptr = np.concatenate([[0], np.cumsum(degree)])
+
+    for page in np.argsort(names)[::-1].tolist():
+        links = "".join(
+            f'<li><a href="page{names[target]}.html">Page {names[target]}</a></li>\n'
+            for target in targets[ptr[page]:ptr[page + 1]].tolist()
+        )
+        path = os.path.join(directory, f"page{names[page]}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n"
+                f"<title>Page {names[page]}</title>\n</head>\n<body>\n"
+                f"<h1>Page {names[page]}</h1>\n<ul>\n{links}</ul>\n"
+                "</body>\n</html>\n"
+            )
+
+
+def to_vector(graph, ranks):
+    """
+    Returns a dictionary of PageRank values as an array in page order.
+    """
+    return np.array([ranks[page] for page in graph.pages])
+
+
+if __name__ == "__main__":
+    main()
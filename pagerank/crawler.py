@@ -0,0 +1,150 @@
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Links in HTML pages, as matched by `crawl` since the beginning
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Bytes of HTML read from a file at a time
+CHUNK_SIZE = 1 << 16
+
+# Files handed to a worker process at a time
+FILES_PER_TASK = 64
+
+# Tasks submitted per worker process at a time, so results cannot pile
+# up without limit when the consumer falls behind
+TASKS_PER_WINDOW = 4
+
+
+def list_pages(directory):
+    """
+    Return the sorted names of the HTML pages in `directory`.
+    """
+    with os.scandir(directory) as entries:
+        return sorted(
+            entry.name for entry in entries
+            if entry.name.endswith(".html") and entry.is_file()
+        )
+
+
+def extract_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Return the set of link targets in the HTML file at `path`,
+    reading it in chunks of `chunk_size` characters.
+    """
+    links = set()
+    carry = ""
+    with open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            text = carry + chunk
+
+            # Hold back anything from the last tag opening onwards,
+            # since that tag may continue into the next chunk
+            cut = text.rfind("<")
+            if cut < 0:
+                cut = len(text)
+            links.update(LINK.findall(text, 0, cut))
+            carry = text[cut:]
+
+    links.update(LINK.findall(carry))
+    return links
+
+
+# Directory and page names of the corpus being crawled by this process
+corpus_directory = None
+corpus_pages = frozenset()
+
+
+def init_worker(directory, pages):
+    """
+    Set the corpus crawled by this process.
+    """
+    global corpus_directory, corpus_pages
+    corpus_directory = directory
+    corpus_pages = pages
+
+
+def page_links(page):
+    """
+    Return (page, links) for a page of the corpus being crawled,
+    keeping only links to other pages in the corpus.
+    """
+    links = extract_links(os.path.join(corpus_directory, page))
+    return page, sorted(
+        link for link in links
+        if link in corpus_pages and link != page
+    )
+
+
+def crawl_edges(directory, workers=None):
+    """
+    Yield a (page, link) pair for every link between two different
+    HTML pages in `directory`, a page at a time, extracting links
+    across a pool of `workers` processes.
+
+    Only the names of the pages are held in memory, never their contents.
+    """
+    pages = list_pages(directory)
+    names = frozenset(pages)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pages) <= FILES_PER_TASK:
+        init_worker(directory, names)
+        yield from edges(map(page_links, pages))
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(directory, names)
+    ) as executor:
+        yield from edges(bounded_map(executor, page_links, pages, workers))
+
+
+def edges(results):
+    """
+    Yield a (page, link) pair for each link in a sequence of
+    (page, links) results.
+    """
+    for page, links in results:
+        for link in links:
+            yield page, link
+
+
+def extract_all(paths, workers=None):
+    """
+    Yield the set of link targets in each HTML file in `paths`, in order,
+    extracting links across a pool of `workers` processes.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= FILES_PER_TASK:
+        yield from map(extract_links, paths)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from bounded_map(executor, extract_links, paths, workers)
+
+
+def bounded_map(executor, function, items, workers):
+    """
+    Yield `function` of each item in `items`, in order, computed by
+    `executor` in windows of TASKS_PER_WINDOW tasks per worker.
+
+    The next window is submitted before the current one is consumed,
+    keeping the workers busy, but no more than two windows are ever
+    in flight, however far behind the consumer falls.
+    """
+    window = FILES_PER_TASK * TASKS_PER_WINDOW * workers
+    pending = deque()
+    for start in range(0, len(items), window):
+        pending.append(executor.map(
+            function, items[start:start + window], chunksize=FILES_PER_TASK
+        ))
+        if len(pending) > 1:
+            yield from pending.popleft()
+    while pending:
+        yield from pending.popleft()
@@ -0,0 +1,134 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from crawler import extract_all, list_pages
+from linkgraph import LinkGraph
+from solvers import power_iteration
+
+DAMPING = 0.85
+
+# Bump whenever the layout of the state file changes
+STATE_VERSION = 1
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python incremental.py corpus")
+    ranks, report = update_pagerank(sys.argv[1], DAMPING)
+    print(f"{report['added']} added, {report['modified']} modified, "
+          f"{report['removed']} removed, {report['unchanged']} unchanged")
+    print(f"PageRank Results after {report['iterations']} iterations")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+def state_path(directory):
+    return os.path.join(directory, ".pagerank", "state.json")
+
+
+def load_state(directory, damping_factor):
+    """
+    Return the state saved by the last update of `directory`, or an empty
+    state if there is none or it was computed with another damping factor.
+    """
+    try:
+        with open(state_path(directory), encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = None
+
+    if (state is None or state.get("version") != STATE_VERSION
+            or state.get("damping") != damping_factor):
+        return {"files": {}, "ranks": {}}
+    return state
+
+
+def save_state(directory, state):
+    """
+    Write `state` for the next update of `directory`,
+    replacing the previous state in a single rename.
+    """
+    path = state_path(directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def update_pagerank(directory, damping_factor, tolerance=1e-6, workers=None):
+    """
+    Return (ranks, report) for the corpus in `directory`, re-reading only
+    the HTML files added or modified since the last update and starting
+    power iteration from the previous ranks.
+
+    The default `tolerance` is tighter than `iterate_pagerank` uses,
+    so errors do not build up from one update to the next.
+
+    `report` counts the files added, modified, removed and unchanged,
+    and the iterations power iteration needed.
+    """
+    state = load_state(directory, damping_factor)
+    previous = state["files"]
+    files = {}
+    stale = []
+
+    # Reuse the links of every file whose size and mtime are unchanged
+    for page in list_pages(directory):
+        stat = os.stat(os.path.join(directory, page))
+        signature = [stat.st_mtime_ns, stat.st_size]
+        old = previous.get(page)
+        if old is not None and old["signature"] == signature:
+            files[page] = old
+        else:
+            files[page] = {"signature": signature, "links": None}
+            stale.append(page)
+
+    paths = [os.path.join(directory, page) for page in stale]
+    for page, links in zip(stale, extract_all(paths, workers)):
+        files[page]["links"] = sorted(links)
+
+    # Only include links to other pages in the corpus
+    corpus = {
+        page: set(
+            link for link in entry["links"]
+            if link in files and link != page
+        )
+        for page, entry in files.items()
+    }
+    graph = LinkGraph.from_corpus(corpus)
+
+    # Warm start from the last ranks, giving new pages an even share
+    old_ranks = state["ranks"]
+    start = np.array([
+        old_ranks.get(page, 1 / len(graph)) for page in graph.pages
+    ])
+
+    ranks, iterations = power_iteration(
+        graph.transition_matrix(), graph.dangling(), damping_factor,
+        tolerance=tolerance, start=start
+    )
+    ranks = graph.to_ranks(ranks)
+
+    save_state(directory, {
+        "version": STATE_VERSION,
+        "damping": damping_factor,
+        "files": files,
+        "ranks": ranks
+    })
+
+    added = sum(1 for page in stale if page not in previous)
+    report = {
+        "added": added,
+        "modified": len(stale) - added,
+        "removed": sum(1 for page in previous if page not in files),
+        "unchanged": len(files) - len(stale),
+        "iterations": iterations
+    }
+    return ranks, report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from scipy import sparse
+
+# Bump whenever the layout of the files written by `save` changes
+GRAPH_VERSION = 1
+
+# CSR arrays of the graph, each stored as its own .npy file
+ARRAYS = ("indptr", "indices")
+
+
+class LinkGraph():
+    """
+    Links between pages stored in compressed sparse row form,
+    with page names interned to dense integers.
+    """
+
+    def __init__(self, pages, indptr, indices):
+        self.pages = pages
+        self.index = {page: i for i, page in enumerate(pages)}
+
+        # Pages linked to by page i are indices[indptr[i]:indptr[i + 1]]
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds the graph from a corpus dictionary mapping each page
+        to the set of pages it links to.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+
+        indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+        indices = []
+        for i, page in enumerate(pages):
+            links = sorted(index[link] for link in corpus[page])
+            indices.extend(links)
+            indptr[i + 1] = indptr[i] + len(links)
+
+        return cls(pages, indptr, np.array(indices, dtype=np.int32))
+
+    def save(self, path, extra=None):
+        """
+        Writes the graph to the directory `path` as a JSON list of page
+        names and an .npy file for each CSR array, along with an .npy
+        file for each array in the dictionary `extra`.
+
+        The files are written to a temporary directory and then moved
+        into place, so files other processes have memory-mapped from an
+        older graph are unlinked rather than overwritten underneath them.
+        """
+        path = os.path.abspath(path)
+        temp = tempfile.mkdtemp(
+            prefix=os.path.basename(path) + "-", dir=os.path.dirname(path)
+        )
+        try:
+            arrays = {name: getattr(self, name) for name in ARRAYS}
+            arrays.update(extra or {})
+            for name, array in arrays.items():
+                np.save(os.path.join(temp, f"{name}.npy"), array)
+
+            with open(os.path.join(temp, "pages.json"), "w", encoding="utf-8") as f:
+                json.dump(self.pages, f)
+            with open(os.path.join(temp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"version": GRAPH_VERSION, "pages": len(self)}, f)
+
+            replace_dir(temp, path)
+        except BaseException:
+            shutil.rmtree(temp, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Returns the graph saved to the directory `path`, with its CSR
+        arrays memory-mapped unless `mmap` is False, or None if there is
+        no graph there or it was written by another version.
+        """
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != GRAPH_VERSION:
+            return None
+
+        with open(os.path.join(path, "pages.json"), encoding="utf-8") as f:
+            pages = json.load(f)
+        mode = "r" if mmap else None
+        return cls(pages, *(
+            np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+            for name in ARRAYS
+        ))
+
+    def __len__(self):
+        return len(self.pages)
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def dangling(self):
+        """
+        Returns a boolean mask of pages with no outgoing links.
+        """
+        return self.out_degree() == 0
+
+    def transition_matrix(self):
+        """
+        Returns the sparse N x N matrix whose entry (j, i) is the
+        probability of following a link from page i to page j.
+
+        Columns of pages with no links are left empty, so callers
+        must spread those pages' rank across the corpus themselves.
+        """
+        n = len(self)
+        degree = self.out_degree()
+        sources = np.repeat(np.arange(n), degree)
+        weights = 1 / degree[sources]
+        return sparse.csr_matrix(
+            (weights, (self.indices, sources)), shape=(n, n)
+        )
+
+    def to_ranks(self, vector):
+        """
+        Returns a dictionary mapping each page to its value in `vector`.
+        """
+        return {page: float(vector[i]) for i, page in enumerate(self.pages)}
+
+
+def replace_dir(temp, path):
+    """
+    Moves the directory `temp` to `path`, first moving aside and
+    deleting any directory already there.
+    """
+    old = None
+    if os.path.exists(path):
+        old = temp + ".old"
+        os.replace(path, old)
+    os.replace(temp, path)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
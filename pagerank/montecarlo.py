@@ -0,0 +1,124 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def sample_counts(graph, damping_factor, n, walkers, workers=1, seed=None):
+    """
+    Return an array counting the visits to each page of `graph` made by
+    about `n` surfer steps, taken by `walkers` independent random surfers
+    moving in lock-step.
+
+    With more than one worker the surfers are split across a process pool,
+    each worker drawing from its own stream spawned from `seed`. The link
+    structure is placed in shared memory once rather than sent with each
+    task, but the pool only pays off when each worker has many surfers.
+
+    Raises ValueError if there are fewer walkers than workers.
+    """
+    if walkers < workers:
+        raise ValueError(
+            f"{walkers} walkers cannot be split across {workers} workers"
+        )
+    steps = -(-n // walkers)
+    streams = np.random.SeedSequence(seed).spawn(workers)
+    shares = [len(share) for share in np.array_split(np.arange(walkers), workers)]
+
+    if workers == 1:
+        return walk(graph.indptr, graph.indices, damping_factor,
+                    steps, walkers, streams[0])
+
+    blocks = [share(graph.indptr), share(graph.indices)]
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=tuple(spec for _, spec in blocks)
+        ) as executor:
+            futures = [
+                executor.submit(shared_walk, damping_factor, steps, count, stream)
+                for count, stream in zip(shares, streams)
+            ]
+            return sum(future.result() for future in futures)
+    finally:
+        for block, _ in blocks:
+            block.close()
+            block.unlink()
+
+
+def share(array):
+    """
+    Returns (block, spec) for a copy of `array` in a new shared memory
+    block, where spec is the (name, shape, dtype) to attach it by.
+    """
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+# Shared memory blocks and link structure attached by this worker process
+worker_blocks = []
+worker_indptr = None
+worker_indices = None
+
+
+def init_worker(indptr_spec, indices_spec):
+    """
+    Attach this worker to the link structure in shared memory.
+    """
+    global worker_indptr, worker_indices
+    arrays = []
+    for name, shape, dtype in (indptr_spec, indices_spec):
+        block = shared_memory.SharedMemory(name=name)
+        worker_blocks.append(block)
+        arrays.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf))
+    worker_indptr, worker_indices = arrays
+
+
+def shared_walk(damping_factor, steps, walkers, seed):
+    """
+    Returns the visit counts of `walk` over the shared link structure.
+    """
+    return walk(worker_indptr, worker_indices, damping_factor, steps, walkers, seed)
+
+
+def walk(indptr, indices, damping_factor, steps, walkers, seed):
+    """
+    Return an array counting the visits to each page made by `walkers`
+    surfers starting on random pages and each taking `steps` steps over
+    the CSR link structure (`indptr`, `indices`).
+    """
+    rng = np.random.default_rng(seed)
+    n = len(indptr) - 1
+    degree = np.diff(indptr)
+    counts = np.zeros(n, dtype=np.int64)
+
+    # Buffer visits over several steps, so counting them costs about
+    # as much as the steps themselves even when there are few walkers
+    rows = max(1, min(steps, n // walkers))
+    visits = np.empty((rows, walkers), dtype=np.int64)
+    row = 0
+
+    position = rng.integers(n, size=walkers)
+    for _ in range(steps):
+
+        # Follow a random link with probability damping_factor,
+        # unless the page has none, otherwise teleport anywhere
+        follow = (rng.random(walkers) < damping_factor) & (degree[position] > 0)
+        position = np.where(follow, position, rng.integers(n, size=walkers))
+
+        # Pick a link uniformly from the pages of surfers following one
+        linked = position[follow]
+        offset = (rng.random(len(linked)) * degree[linked]).astype(np.int64)
+        position[follow] = indices[indptr[linked] + offset]
+
+        visits[row] = position
+        row += 1
+        if row == rows:
+            counts += np.bincount(visits.ravel(), minlength=n)
+            row = 0
+
+    counts += np.bincount(visits[:row].ravel(), minlength=n)
+    return counts
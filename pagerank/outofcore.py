@@ -0,0 +1,131 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from crawler import crawl_edges, list_pages
+
+DAMPING = 0.85
+
+# Edges read from disk at a time during each sweep
+CHUNK_EDGES = 1 << 22
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python outofcore.py corpus [edges directory]")
+    corpus = sys.argv[1]
+    directory = sys.argv[2] if len(sys.argv) == 3 else os.path.join(corpus, ".edges")
+
+    write_edges(corpus, directory)
+    pages = read_pages(directory)
+    ranks, iterations = edge_pagerank(directory, DAMPING)
+    print(f"PageRank Results from {iterations} Out-of-Core Sweeps")
+    for i in np.argsort(pages):
+        print(f"  {pages[i]}: {ranks[i]:.4f}")
+
+
+def write_edges(corpus, directory, workers=None):
+    """
+    Crawl `corpus` and write its links to `directory` as a binary file of
+    int32 (source, target) pairs sorted by source then target, along with
+    the out-degree of every page and the list of page names.
+
+    Edges are written as the crawler emits them, so the link graph is
+    never held in memory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    pages = list_pages(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    degree = np.zeros(len(pages), dtype=np.int32)
+
+    # Edges are gathered in a fixed buffer and written a chunk at a time
+    buffer = np.empty((CHUNK_EDGES, 2), dtype=np.int32)
+    fill = 0
+    count = 0
+    last = (-1, -1)
+    with open(os.path.join(directory, "edges.bin"), "wb") as f:
+        for page, link in crawl_edges(corpus, workers):
+            edge = (index[page], index[link])
+
+            # The crawler emits pages, and each page's links, in sorted order
+            if edge <= last:
+                raise ValueError(f"Edges out of order at {page} -> {link}")
+            last = edge
+
+            buffer[fill] = edge
+            fill += 1
+            degree[edge[0]] += 1
+            count += 1
+            if fill == CHUNK_EDGES:
+                buffer.tofile(f)
+                fill = 0
+        buffer[:fill].tofile(f)
+
+    np.save(os.path.join(directory, "degree.npy"), degree)
+    with open(os.path.join(directory, "pages.txt"), "w", encoding="utf-8") as f:
+        f.writelines(f"{page}\n" for page in pages)
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"pages": len(pages), "edges": count}, f)
+
+
+def read_pages(directory):
+    """
+    Return the list of page names of the edge file in `directory`.
+    """
+    with open(os.path.join(directory, "pages.txt"), encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f]
+
+
+def edge_pagerank(directory, damping_factor, tolerance=0.001, trace=None):
+    """
+    Return (ranks, iterations) for the edge file in `directory`, where
+    ranks is an array in page order, running each power-iteration sweep
+    as a sequential scan over the memory-mapped edges.
+
+    Only the rank vectors and out-degrees are held in memory. Iteration
+    stops once the ranks change by no more than `tolerance` (L1 norm).
+    """
+    with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    n = meta["pages"]
+    edges = np.memmap(
+        os.path.join(directory, "edges.bin"), dtype=np.int32, mode="r",
+        shape=(meta["edges"], 2)
+    ) if meta["edges"] > 0 else np.zeros((0, 2), dtype=np.int32)
+    degree = np.load(os.path.join(directory, "degree.npy"))
+    dangling = degree == 0
+
+    ranks = np.full(n, 1 / n)
+    iterations = 0
+
+    while True:
+        iterations += 1
+
+        # Share of rank each page passes along each of its links
+        share = np.divide(ranks, degree, out=np.zeros(n), where=~dangling)
+
+        new_ranks = np.zeros(n)
+        for start in range(0, len(edges), CHUNK_EDGES):
+            chunk = np.asarray(edges[start:start + CHUNK_EDGES])
+            new_ranks += np.bincount(
+                chunk[:, 1], weights=share[chunk[:, 0]], minlength=n
+            )
+
+        # Rank of pages without links is spread evenly across the corpus
+        spread = ranks[dangling].sum() / n
+        new_ranks = damping_factor * (new_ranks + spread) + (1 - damping_factor) / n
+
+        change = float(np.abs(new_ranks - ranks).sum())
+        if trace is not None:
+            trace.append((iterations, change))
+        ranks = new_ranks
+        if change <= tolerance:
+            break
+
+    return ranks / ranks.sum(), iterations
+
+
+if __name__ == "__main__":
+    main()
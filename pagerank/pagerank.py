@@ -1,10 +1,15 @@
 import os
 import random
-import re
 import sys
-from math import isclose
 # import networkx as nx
 
+import numpy as np
+
+from crawler import crawl_edges, list_pages
+from linkgraph import LinkGraph
+from montecarlo import sample_counts
+from solvers import SOLVERS, block_power_iteration
+
 DAMPING = 0.85
 SAMPLES = 10000
 
@@ -13,7 +18,7 @@ def main():
     if len(sys.argv) != 2:
         print(sys.argv[1])
         sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    corpus = load_graph(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
@@ -28,33 +33,76 @@ def main():
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, workers=None):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    Files are read in chunks and parsed across `workers` processes.
     """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
+    pages = {page: set() for page in list_pages(directory)}
+
+    # Only links to other pages in the corpus are emitted
+    for page, link in crawl_edges(directory, workers):
+        pages[page].add(link)
 
     return pages
 
 
+def graph_dir(directory):
+    return os.path.join(directory, ".linkgraph")
+
+
+def page_mtimes(directory, pages):
+    """
+    Returns the modification time of each page in `directory`.
+    """
+    return np.array([
+        os.stat(os.path.join(directory, page)).st_mtime_ns for page in pages
+    ], dtype=np.int64)
+
+
+def load_graph(directory, workers=None):
+    """
+    Return the LinkGraph of the HTML pages in `directory`, loaded from the
+    graph saved by an earlier crawl when no page has been added, removed
+    or modified since, and otherwise crawled and saved for next time.
+
+    Loading memory-maps the saved CSR arrays without parsing any HTML.
+    """
+    path = graph_dir(directory)
+    pages = list_pages(directory)
+    mtimes = page_mtimes(directory, pages)
+
+    graph = LinkGraph.load(path)
+    if graph is not None and graph.pages == pages:
+        try:
+            saved = np.load(os.path.join(path, "mtimes.npy"))
+        except OSError:
+            saved = None
+        if saved is not None and np.array_equal(saved, mtimes):
+            return graph
+
+    graph = LinkGraph.from_corpus(crawl(directory, workers))
+
+    # A corpus that cannot be written to is simply crawled every time
+    try:
+        graph.save(path, {"mtimes": mtimes})
+    except OSError:
+        pass
+    return graph
+
+
+def as_graph(corpus):
+    """
+    Return `corpus` as a LinkGraph, building one if it is a dictionary.
+    """
+    if isinstance(corpus, LinkGraph):
+        return corpus
+    return LinkGraph.from_corpus(corpus)
+
+
 def transition_model(corpus, page, damping_factor):
     """
     Return a probability distribution over which page to visit next,
@@ -113,45 +161,72 @@ def transition_model(corpus, page, damping_factor):
     return distribution
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, walkers=1, workers=1, seed=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    With more than one walker, the samples are taken by that many
+    surfers moving in lock-step with NumPy, optionally split across
+    `workers` processes with independent random streams from `seed`.
+    A single walker draws from its own `random.Random(seed)`, so
+    either way the same `seed` gives the same samples.
+    `corpus` may also be a LinkGraph, such as one from `load_graph`.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    
+    if walkers > 1 or workers > 1:
+        graph = as_graph(corpus)
+        counts = sample_counts(graph, damping_factor, n, walkers, workers, seed)
+        return graph.to_ranks(counts / counts.sum())
+
+    # Precompute the links of every page once, so each step only needs
+    # two O(1) draws: whether to follow a link, then which page to visit.
+    # This gives the same distribution as `transition_model`, since
+    # teleporting lands on every page, linked or not, equally often.
+    if isinstance(corpus, LinkGraph):
+        pages = list(corpus.pages)
+        indptr = corpus.indptr.tolist()
+        indices = corpus.indices.tolist()
+        links = {
+            page: tuple(pages[j] for j in indices[indptr[i]:indptr[i + 1]])
+            for i, page in enumerate(pages)
+        }
+    else:
+        pages = list(corpus.keys())
+
+        # Sort links, since the order of a set of names varies between runs
+        links = {page: tuple(sorted(corpus[page])) for page in pages}
+
     # Create output dictionary with all keys
     out = {}
 
-    for page in corpus:
+    for page in pages:
 
         # Set all starting values to 0
         out[page] = 0
 
-    # Choose first page randomly
-    start_page = random.choice(list(corpus.keys()))
+    rng = random.Random(seed)
 
-    # Obtain initial transition probabilities
-    transit = transition_model(corpus, start_page, damping_factor)
+    # Choose first page randomly
+    page = rng.choice(pages)
 
     # Collect n samples
     for _ in range(n):
 
-        # Randomly select next page based on transition probabilities
-        pages = list(transit.keys())
-        weights = list(transit.values())
+        # Follow a random link with probability damping_factor,
+        # unless the page has none
+        if links[page] and rng.random() < damping_factor:
+            page = rng.choice(links[page])
 
-        # Choose next page based on previous weights
-        next_page = random.choices(pages, weights, k=1)[0]
+        # Otherwise teleport to any page in the corpus
+        else:
+            page = rng.choice(pages)
 
         # Update the total page visits
-        out[next_page] += 1
-
-        # Update transition probabilities
-        transit = transition_model(corpus, next_page, damping_factor)
+        out[page] += 1
 
     # Normalise the probability samples
     for page in out:
@@ -161,111 +236,82 @@ def sample_pagerank(corpus, damping_factor, n):
     return out
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, method="power", tolerance=0.001,
+                     trace=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
 
+    `method` names the solver in `solvers.SOLVERS` to iterate with, and
+    convergence is reached once PageRank values change by no more than
+    `tolerance` in total. If `trace` is a list, an (iteration, residual)
+    pair is appended to it for every sweep. `corpus` may also be a
+    LinkGraph, which is handed to the solver without being rebuilt.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
 
-    # Define initial transition matrix with each node 1/N
-    prev_ranks = {}
-    new_ranks = {}
-    N = len(corpus)
-
-    # Count iterations
-    iter = 0
-
-    for page in corpus:
-        new_ranks[page] = 1 / N
-
-    for page in corpus:
-        prev_ranks[page] = 0
-    
-    # Calculate probability of navigating to page by randomly "teleporting"
-    rdom = (1 - damping_factor) / N
-
-    # Construct incoming links dictionary
-    # Each key, value pair represents the pages linking to the key
-    # {"page 1": ["page 2", "page 3"]} - pages 2 and 3 link to page 1
-    in_corpus = {}
-    for page1 in corpus:
-        in_corpus[page1] = []
-        for page2 in corpus:
-            if page1 == page2:
-                continue
-            if page1 in corpus[page2]:
-                in_corpus[page1].append(page2)
-
-    # Continue iterating until converged
-    while not converged(prev_ranks, new_ranks):
-
-        # Increment counter for debug
-        iter += 1
-
-        # Reassign the "new_ranks" to the "prev_ranks"
-        prev_ranks = new_ranks.copy()
-
-        # Calculate new rankings
-        for page in corpus:
+    # Build the sparse link structure once
+    graph = as_graph(corpus)
+    matrix = graph.transition_matrix()
 
-            # Calculate the probability of navigating to page by link travel
-            pr_sum = 0
+    # Iterate until the PRs change by no more than the tolerance in total
+    ranks, iterations = SOLVERS[method](
+        matrix, graph.dangling(), damping_factor,
+        tolerance=tolerance, trace=trace
+    )
 
-            # Add together the page ranks of the incoming links
-            for incoming_page in in_corpus[page]:
+    # print(f"Converged after {iterations} iterations.")
 
-                # Handle case of dangling node where 0 incoming links
-                if not len(corpus[incoming_page]) == 0:
-                    # The rank of the incoming page in the previous iteration
-                    # divided by the number of links on the incoming page
-                    pr_sum += prev_ranks[incoming_page] / len(corpus[incoming_page])
+    return graph.to_ranks(ranks)
 
-                else:
-                    pr_sum += prev_ranks[incoming_page] / N
 
-            pr_sum_damped = pr_sum * damping_factor
-
-            # Calculate new PR for page
-            new_ranks[page] = rdom + pr_sum_damped
-                
-    # print(f"Converged after {iter} iterations.")
-
-    return new_ranks
-
-
-def converged(old, new):
-    """
-    Takes two dictionaries and checks if convergence has occurred.
-
-    Convergence occurs when no PR changes by more than 0.001.
+def personalized_pagerank(corpus, damping_factor, seeds, tolerance=0.001):
     """
+    Return personalised PageRank values for many seed sets at once.
 
-    # Check that sum to 1
-    # total = sum(list(new.values()))
+    `seeds` maps a name to either a set of pages, which surfers teleport
+    to uniformly, or a dictionary of page weights giving the teleport
+    distribution. All seed sets are solved together by block power
+    iteration. `corpus` may also be a LinkGraph.
 
-    # if not isclose(total, 1.0):
-    #     raise ValueError(f"Total probability is {total}")
+    Return a dictionary mapping each name in `seeds` to a dictionary of
+    PageRank values like `iterate_pagerank`.
 
-    # Convergence occurs when no PR changes by more than 0.001
-    for page in old:
-
-        # When any page rank changes by more than 0.001, no convergence
-        if abs(old[page] - new[page]) > 0.001:
-            return False
-    
-    # Normalise
-    total_sum = sum(list(new.values()))
-    if not isclose(total_sum, 1.0):
-        for p in new:
-            new[p] *= 1.0 / total_sum
-
-    # print(sorted(new.items(), key=lambda item: item[1]))
-
-    return True
+    Raises ValueError if a seed set is empty, names a page not in the
+    corpus, or has negative weights or weights summing to zero.
+    """
+    graph = as_graph(corpus)
+    names = list(seeds)
+
+    # Build one teleport vector per seed set as a column
+    teleports = np.zeros((len(graph), len(names)))
+    for column, name in enumerate(names):
+        weights = seeds[name]
+        if not isinstance(weights, dict):
+            weights = {page: 1 for page in weights}
+        if len(weights) == 0:
+            raise ValueError(f"Seed set {name!r} is empty")
+        for page, weight in weights.items():
+            if page not in graph.index:
+                raise ValueError(f"Seed set {name!r} names unknown page {page!r}")
+            if not weight >= 0:
+                raise ValueError(f"Seed set {name!r} gives {page!r} weight {weight}")
+            teleports[graph.index[page], column] = weight
+        if teleports[:, column].sum() <= 0:
+            raise ValueError(f"Weights of seed set {name!r} sum to zero")
+
+    ranks, iterations = block_power_iteration(
+        graph.transition_matrix(), graph.dangling(), damping_factor,
+        teleports, tolerance=tolerance
+    )
+
+    return {
+        name: graph.to_ranks(ranks[:, column])
+        for column, name in enumerate(names)
+    }
 
 
 if __name__ == "__main__":
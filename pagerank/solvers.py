@@ -0,0 +1,316 @@
+import numpy as np
+from scipy.sparse import identity, tril, triu
+from scipy.sparse.linalg import splu
+
+# Iterations between extrapolation steps in the extrapolating solvers
+EXTRAPOLATE_EVERY = 10
+
+# Iterations between full sweeps in the adaptive solver
+FULL_SWEEP_EVERY = 5
+
+# Most sweeps block power iteration makes before giving up on convergence
+MAX_ITERATIONS = 1000
+
+
+def power_iteration(matrix, dangling, damping_factor, tolerance=0.001,
+                    start=None, trace=None):
+    """
+    Return (ranks, iterations) for the PageRank vector of the graph with
+    link transition `matrix`, computed by repeated sparse mat-vec products
+    until the ranks change by no more than `tolerance` in total (L1 norm).
+
+    Pages flagged in `dangling` are treated as linking to every page,
+    applied as a rank-one correction rather than filling in the matrix.
+
+    Iteration starts from the uniform distribution, or from `start`
+    when a nearby solution such as an earlier ranking is known.
+
+    If `trace` is a list, an (iteration, residual) pair is appended
+    to it after every sweep.
+    """
+    ranks = initial(matrix, start)
+    iterations = 0
+
+    while True:
+        iterations += 1
+        new_ranks = step(matrix, dangling, damping_factor, ranks)
+        change = residual(new_ranks, ranks, iterations, trace)
+        ranks = new_ranks
+        if change <= tolerance:
+            break
+
+    return ranks / ranks.sum(), iterations
+
+
+def gauss_seidel(matrix, dangling, damping_factor, tolerance=0.001,
+                 start=None, trace=None):
+    """
+    Return (ranks, iterations) like `power_iteration`, but sweeping pages
+    in order and using each page's new rank as soon as it is computed.
+
+    Each sweep is a sparse triangular solve of the lower part of
+    I - damping_factor * matrix, with the upper part and the spread of
+    rank from pages without links taken from the previous sweep. The
+    lower part is handed to SuperLU once, in its natural order and
+    without pivoting, so it is already its own factor.
+
+    It needs fewer sweeps than power iteration, but each costs about
+    two mat-vec products, plus the set-up, so on the benchmark graphs
+    it is slower overall: 24 sweeps in 0.44 s against 41 in 0.20 s
+    on 200,000 pages at tolerance 1e-6.
+    """
+    n = matrix.shape[0]
+    system = (damping_factor * matrix).tocsr()
+    lower = tril(-system, format="csc") + identity(n, format="csc")
+    upper = triu(system, k=1, format="csr")
+    solve = splu(
+        lower, permc_spec="NATURAL", diag_pivot_thresh=0,
+        options={"SymmetricMode": True}
+    ).solve
+
+    ranks = initial(matrix, start)
+    iterations = 0
+
+    while True:
+        iterations += 1
+        spread = ranks[dangling].sum() / n
+        rhs = upper @ ranks + damping_factor * spread + (1 - damping_factor) / n
+        new_ranks = solve(rhs)
+        new_ranks /= new_ranks.sum()
+        change = residual(new_ranks, ranks, iterations, trace)
+        ranks = new_ranks
+        if change <= tolerance:
+            break
+
+    return ranks, iterations
+
+
+def aitken(matrix, dangling, damping_factor, tolerance=0.001,
+           start=None, trace=None):
+    """
+    Return (ranks, iterations) like `power_iteration`, periodically
+    jumping to the Aitken delta-squared extrapolation of each page's
+    rank from the last three iterates.
+    """
+    return extrapolated(
+        matrix, dangling, damping_factor, tolerance, start, trace,
+        aitken_step
+    )
+
+
+def quadratic(matrix, dangling, damping_factor, tolerance=0.001,
+              start=None, trace=None):
+    """
+    Return (ranks, iterations) like `power_iteration`, periodically
+    replacing the ranks with a quadratic extrapolation from the last
+    four iterates, which removes the two largest error components.
+    """
+    return extrapolated(
+        matrix, dangling, damping_factor, tolerance, start, trace,
+        quadratic_step
+    )
+
+
+def adaptive(matrix, dangling, damping_factor, tolerance=0.001,
+             start=None, trace=None):
+    """
+    Return (ranks, iterations) like `power_iteration`, but freezing
+    each page once its rank changes by less than its share of
+    `tolerance`, so most sweeps only recompute the pages still moving.
+
+    Every FULL_SWEEP_EVERY sweeps all pages are recomputed again, and
+    only a full sweep can end the iteration, so frozen pages cannot
+    hide an unconverged solution.
+
+    It pays off when pages settle at different rates. On the clustered
+    benchmark graphs every page's change shrinks at the same rate, so
+    few freeze before the end: it makes about 95% of power iteration's
+    row updates, and each partial sweep first has to slice out the
+    active rows.
+    """
+    n = matrix.shape[0]
+    ranks = initial(matrix, start)
+    active = np.arange(n)
+    rows = matrix
+    iterations = 0
+
+    while True:
+        iterations += 1
+        full = len(active) == n
+        spread = ranks[dangling].sum() / n
+        updated = damping_factor * (rows @ ranks + spread) + (1 - damping_factor) / n
+        moved = np.abs(updated - ranks[active])
+        ranks[active] = updated
+
+        change = float(moved.sum())
+        if trace is not None:
+            trace.append((iterations, change))
+
+        if full:
+            if change <= tolerance:
+                break
+
+            # Stop recomputing pages that have settled
+            active = active[moved > tolerance / n]
+            rows = matrix[active]
+
+        elif iterations % FULL_SWEEP_EVERY == 0 or len(active) == 0:
+            active = np.arange(n)
+            rows = matrix
+
+    return ranks / ranks.sum(), iterations
+
+
+def block_power_iteration(matrix, dangling, damping_factor, teleports,
+                          tolerance=0.001, trace=None,
+                          max_iterations=MAX_ITERATIONS):
+    """
+    Return (ranks, iterations) for many personalised PageRank vectors at
+    once, one per column of the N x K `teleports` matrix, sharing each
+    sparse product with the link matrix across every column.
+
+    Each column of `teleports` gives the distribution surfers teleport to,
+    and pages without links pass their rank on the same way. Iteration
+    stops once no column changes by more than `tolerance` (L1 norm), or
+    after `max_iterations` sweeps.
+
+    Raises ValueError if a column has negative weights or sums to zero.
+    """
+    teleports = np.asarray(teleports, dtype=np.float64)
+    if teleports.ndim != 2 or teleports.shape[0] != matrix.shape[0]:
+        raise ValueError("teleports must have one row per page")
+    if not np.isfinite(teleports).all() or (teleports < 0).any():
+        raise ValueError("teleport weights must be finite and non-negative")
+    totals = teleports.sum(axis=0)
+    if (totals <= 0).any():
+        raise ValueError(
+            f"teleport column {int(np.argmax(totals <= 0))} sums to zero"
+        )
+    teleports = teleports / totals
+    ranks = teleports.copy()
+    iterations = 0
+
+    while True:
+        iterations += 1
+        stranded = ranks[dangling].sum(axis=0)
+        new_ranks = (
+            damping_factor * (matrix @ ranks + teleports * stranded)
+            + (1 - damping_factor) * teleports
+        )
+        change = float(np.abs(new_ranks - ranks).sum(axis=0).max())
+        if trace is not None:
+            trace.append((iterations, change))
+        ranks = new_ranks
+        if change <= tolerance or iterations >= max_iterations:
+            break
+
+    return ranks / ranks.sum(axis=0), iterations
+
+
+# Solvers selectable by name in `iterate_pagerank`
+SOLVERS = {
+    "power": power_iteration,
+    "gauss-seidel": gauss_seidel,
+    "aitken": aitken,
+    "quadratic": quadratic,
+    "adaptive": adaptive
+}
+
+
+def extrapolated(matrix, dangling, damping_factor, tolerance, start, trace,
+                 extrapolate):
+    """
+    Run power iteration, calling `extrapolate` on the recent iterates
+    every EXTRAPOLATE_EVERY sweeps to jump closer to the solution.
+
+    A jump is only kept if the extrapolated ranks are all non-negative
+    and one sweep from them changes the ranks by less than the next
+    plain sweep is expected to, otherwise power iteration carries on.
+    Checking a jump costs a sweep, which is counted in the iterations.
+    """
+    ranks = initial(matrix, start)
+    history = [ranks]
+    iterations = 0
+
+    while True:
+        iterations += 1
+        new_ranks = step(matrix, dangling, damping_factor, ranks)
+        change = residual(new_ranks, ranks, iterations, trace)
+        history = history[-3:] + [new_ranks]
+
+        if (change > tolerance and iterations % EXTRAPOLATE_EVERY == 0
+                and len(history) == 4):
+            guess = extrapolate(history)
+            if (guess >= 0).all() and guess.sum() > 0:
+                guess = guess / guess.sum()
+                iterations += 1
+                after = step(matrix, dangling, damping_factor, guess)
+                jump = float(np.abs(after - guess).sum())
+                if jump < damping_factor * change:
+                    if trace is not None:
+                        trace.append((iterations, jump))
+                    new_ranks = after
+                    change = jump
+                    history = [guess, after]
+
+        ranks = new_ranks
+        if change <= tolerance:
+            break
+
+    return ranks / ranks.sum(), iterations
+
+
+def aitken_step(history):
+    """
+    Return the componentwise Aitken extrapolation of the last three iterates.
+    """
+    x0, x1, x2 = history[-3:]
+    second = x2 - 2 * x1 + x0
+    safe = np.abs(second) > 1e-15
+    out = x2.copy()
+    out[safe] = x2[safe] - (x2[safe] - x1[safe]) ** 2 / second[safe]
+    return out
+
+
+def quadratic_step(history):
+    """
+    Return the quadratic extrapolation of the last four iterates,
+    as described by Kamvar et al. for accelerating PageRank.
+    """
+    x0, x1, x2, x3 = history
+    y = np.column_stack([x1 - x0, x2 - x0])
+    gamma, *_ = np.linalg.lstsq(y, -(x3 - x0), rcond=None)
+    g1, g2, g3 = gamma[0], gamma[1], 1.0
+    return (g1 + g2 + g3) * x1 + (g2 + g3) * x2 + g3 * x3
+
+
+def initial(matrix, start):
+    """
+    Return the starting ranks: `start` normalised to sum to 1,
+    or the uniform distribution if no start is given.
+    """
+    n = matrix.shape[0]
+    if start is None:
+        return np.full(n, 1 / n)
+    return np.asarray(start, dtype=np.float64) / np.sum(start)
+
+
+def residual(new_ranks, ranks, iterations, trace):
+    """
+    Return the L1 change between two iterates, recording it in `trace`.
+    """
+    change = float(np.abs(new_ranks - ranks).sum())
+    if trace is not None:
+        trace.append((iterations, change))
+    return change
+
+
+def step(matrix, dangling, damping_factor, ranks):
+    """
+    Return the ranks after one surfer step from `ranks`.
+    """
+    n = matrix.shape[0]
+
+    # Rank of pages without links is spread evenly across the corpus
+    spread = ranks[dangling].sum() / n
+    return damping_factor * (matrix @ ranks + spread) + (1 - damping_factor) / n